@@ -0,0 +1,108 @@
+"""
+Measure-adoption analytics on loaded agent histories.
+
+The adoption shares of all scenarios and measures follow from a boolean
+agent-round × measure matrix with a few groupbys, instead of splitting
+strings per cell and per measure. For saved runs the matrix comes from
+the purchase events (export.measure_holdings):
+
+    runs = load_runs("results", columns=["agent_id", "round"])
+    held = measure_holdings(runs, load_run_purchases("results")) > 0
+    ever = ever_adopted_shares(runs, held)     # scenario × measure
+    final = final_adoption_shares(runs, held)  # scenario × measure
+
+For histories with a measures column (';'-separated strings, e.g. a
+history dict of model.py) measure_matrix parses every distinct string
+once into the same matrix; it is used when no matrix is given.
+"""
+
+import numpy as np
+import pandas as pd
+
+from export import RUN_KEYS
+
+
+def split_measures(x):
+    """
+    Measure names of one measures cell ('A;B;C', empty or NaN).
+    """
+
+    if pd.isna(x) or str(x).strip() == "":
+        return []
+    return [m.strip() for m in str(x).split(";") if m.strip()]
+
+
+def measure_matrix(measures: pd.Series) -> pd.DataFrame:
+    """
+    One-hot matrix of a measures column.
+
+    Args:
+        measures (pd.Series): Measures strings, one per agent and round.
+
+    Returns:
+        pd.DataFrame: Boolean frame with the index of measures and one
+        column per measure name (sorted), True where the row has it.
+    """
+
+    # Agents share few distinct measure sets, so parse each set once
+    codes, sets = pd.factorize(measures)
+    parsed = [split_measures(x) for x in sets]
+    names = sorted({m for ms in parsed for m in ms})
+    column = {m: j for j, m in enumerate(names)}
+
+    # One spare all-False row at the end: factorize codes NaN as -1
+    onehot = np.zeros((len(sets) + 1, len(names)), dtype=bool)
+    for i, ms in enumerate(parsed):
+        onehot[i, [column[m] for m in ms]] = True
+
+    return pd.DataFrame(onehot[codes], index=measures.index, columns=names)
+
+
+def _held(df, held):
+    """
+    Measure matrix of df (columns sorted by name): held, or parsed from
+    the measures column.
+    """
+
+    return measure_matrix(df["measures"]) if held is None else held.loc[df.index].sort_index(axis=1)
+
+
+def ever_adopted_shares(df: pd.DataFrame, held=None, agent_col="agent_id", by="scenario_id",
+                        run_keys=RUN_KEYS) -> pd.DataFrame:
+    """
+    Share of agents that ever had each measure, per run averaged over runs.
+
+    Measures that nobody held get no column.
+
+    Args:
+        df (pd.DataFrame): Histories with run_keys, agent_col and measures
+            (or the matrix in held).
+        held (pd.DataFrame, optional): Boolean measure matrix of the rows
+            of df, e.g. measure_holdings(...) > 0.
+        agent_col (str): Column with the agent id.
+        by (str): Column of run_keys to average the runs over.
+        run_keys (list of str): Columns that identify one run.
+
+    Returns:
+        pd.DataFrame: by × measure table with shares between 0 and 1.
+    """
+
+    onehot = _held(df, held)
+    onehot = onehot.loc[:, onehot.any()]
+    ever = onehot.groupby([df[k] for k in run_keys] + [df[agent_col]], sort=False).max()
+    per_run = ever.groupby(level=list(run_keys), sort=False).mean()
+    return per_run.groupby(level=by).mean()
+
+
+def final_adoption_shares(df: pd.DataFrame, held=None, by="scenario_id") -> pd.DataFrame:
+    """
+    Share of agents with each measure in the final round, per by value.
+
+    The final round is the last round in df, so runs that stopped earlier
+    are left out. Only measures present in the final round get a column.
+    held is an optional measure matrix as in ever_adopted_shares.
+    """
+
+    final = df[df["round"] == df["round"].max()]
+    onehot = _held(final, held)
+    return onehot.loc[:, onehot.any()].groupby(final[by]).mean()
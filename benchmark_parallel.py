@@ -0,0 +1,79 @@
+# ------------------------------------------------------------
+#
+# Benchmark van de uitvoermodi van run_scenarios.run_all_scenarios en
+# experiment.run_all_experiments: serieel, process pool en thread pool.
+#
+# Threads lopen alleen echt parallel op een free-threaded Python
+# (PEP 703, bijv. python3.14t); met GIL is de thread pool ongeveer
+# even snel als serieel. De resultaten moeten in alle modi gelijk zijn.
+#
+# ------------------------------------------------------------
+
+import contextlib
+import dataclasses
+import io
+import os
+import sys
+import tempfile
+import time
+
+import experiment
+from run_scenarios import run_all_scenarios
+
+
+def gil_enabled() -> bool:
+    """True als deze Python een GIL heeft (altijd True voor Python < 3.13)."""
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else check()
+
+
+def time_run(**kwargs):
+    """Runt run_all_scenarios zonder voortgangsoutput en geeft (seconden, resultaat)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = run_all_scenarios(**kwargs)
+    return time.perf_counter() - start, result
+
+
+def time_experiments(**kwargs):
+    """
+    Runt run_all_experiments zonder voortgangsoutput en geeft (seconden,
+    resultaat). Met results_format="sketch" wordt alleen de tevredenheid
+    per ronde weggeschreven; dat bestand is het resultaat.
+    """
+    with tempfile.TemporaryDirectory() as results_dir:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            experiment.run_all_experiments(
+                experiment.houses_dict, results_format="sketch", results_dir=results_dir, **kwargs
+            )
+        seconds = time.perf_counter() - start
+        with open(os.path.join(results_dir, experiment.SATISFACTION_COUNTS)) as f:
+            return seconds, f.read()
+
+
+def compare(name, timer, workers, **kwargs):
+    """Print de looptijd per modus en of het resultaat gelijk is aan serieel."""
+    print(name)
+    t_serial, reference = timer(**kwargs)
+    print(f"  serieel       {t_serial:7.1f} s")
+
+    for executor in ["process", "thread"]:
+        t, result = timer(workers=workers, executor=executor, **kwargs)
+        same = "gelijk" if result == reference else "VERSCHILLEND"
+        print(f"  {executor:13s} {t:7.1f} s | x{t_serial / t:4.1f} | resultaat {same}")
+
+
+if __name__ == "__main__":
+    N_REPS = 5
+    ENGINE = "population"
+    EXPERIMENT_RUNS = 4
+    WORKERS = max(2, os.cpu_count() or 1)
+
+    print(f"Python {sys.version.split()[0]} | GIL: {'aan' if gil_enabled() else 'uit'} | workers={WORKERS}")
+
+    compare("run_scenarios", time_run, WORKERS, n_reps=N_REPS, engine=ENGINE)
+
+    # Minder runs per scenario dan in experiment.py, zodat de benchmark kort blijft
+    experiment.SCENARIOS[:] = [dataclasses.replace(s, runs=EXPERIMENT_RUNS) for s in experiment.SCENARIOS]
+    compare("experiment", time_experiments, WORKERS)
@@ -1,17 +1,23 @@
 import random
 
-def floods(seed=None):
+def floods(seed=None, rng=None):
     """
     Simulates the occurrence of rain and river floods.
 
     Rain flood:  1 in 10 chance
     River flood: 1 in 12 chance
+
+    rng (random.Random) draws from a private generator instead of the
+    global random module, e.g. one per thread.
     """
+    if rng is None:
+        rng = random
+
     if seed is not None:
-        random.seed(seed)
+        rng.seed(seed)
 
-    rain = random.randint(1, 10)
-    river = random.randint(1, 12)
+    rain = rng.randint(1, 10)
+    river = rng.randint(1, 12)
 
     return {"rain_damage": rain, "river_damage": river}
 
@@ -1,9 +1,58 @@
+import numpy as np
+
+from classes.housing_market import HousingMarket, first_suitable_house, set_available
+from classes.pmt_tables import flood_probability, flood_probability_array, measure_risk_reduction
+
+
+# Round in which subsidies apply (see Agent.get_effective_cost)
+SUBSIDY_ROUND = 4
+
+
+# Default model parameters
+DEFAULT_PARAMS = {
+    "damage_costs": 4000,
+    "wealth_scale": 100000,
+    "measure_threshold": 0.6,
+    "relocation_threshold": 0.6,
+    "sat_effect_bonus": 0.5,
+    "experience_weight": 0.7, #toegevoegd door Juliette
+}
+
+
+def shared_params(overrides=None):
+    """
+    One parameter dict for a whole population.
+
+    Agents created with the same dict share it instead of holding a copy
+    each, so parameters must be set here (per population) and not changed
+    per agent afterwards.
+
+    Args:
+        overrides (dict, optional): Parameters that differ from DEFAULT_PARAMS.
+
+    Returns:
+        dict: DEFAULT_PARAMS updated with the overrides.
+    """
+
+    params = dict(DEFAULT_PARAMS)
+    params.update(overrides or {})
+    return params
+
+
 class Agent:
     """
     Household agent that makes adaptation and relocation decisions
     under flood risk using Protection Motivation Theory (PMT).
     """
 
+    __slots__ = (
+        "ID", "wealth", "income", "experience_level", "self_efficacy", "house",
+        "adopted_measures", "adopted_mask", "satisfaction", "damage_history", "satisfaction_history", "wealth_history",
+        "max_mortgage", "mortgage", "preferred_rating", "protection", "params",
+        # Bookkeeping of export.save_history
+        "_prev_measures_len", "_prev_measures_set",
+    )
+
     def __init__(self, ID, wealth, income, experience_level, self_efficacy, house, params=None):
         """
         Initialize a household agent.
@@ -14,8 +63,9 @@ class Agent:
             income (float): Periodic income (€).
             experience_level (str): Flood experience category.
             self_efficacy (float): Perceived ability to act (0–1).
-            house (str or None): Current house ID.
-            params (dict): Model parameters.
+            house (int, str or None): Current house ID.
+            params (dict): Model parameters, possibly shared with the rest
+                of the population (see shared_params).
         """
 
         # Static agent attributes
@@ -28,6 +78,7 @@ class Agent:
 
         # Dynamic state variables
         self.adopted_measures = []     
+        self.adopted_mask = 0           # bit i = measure with index i adopted (see MeasureCatalogue)
         self.satisfaction = 5       
         self.damage_history = []       
         self.satisfaction_history = []
@@ -37,18 +88,15 @@ class Agent:
         # Financial constraints
         self.max_mortgage = self.wealth * 10
         self.mortgage = None
+        self.preferred_rating = 0
 
         # Current protection levels
         self.protection = {"rain_protection": 0, "river_protection": 0}
 
         # Model parameters with defaults
-        self.params = params or {}
-        self.params.setdefault("damage_costs", 4000)
-        self.params.setdefault("wealth_scale", 100000)
-        self.params.setdefault("measure_threshold", 0.6)
-        self.params.setdefault("relocation_threshold", 0.6)
-        self.params.setdefault("sat_effect_bonus", 0.5)
-        self.params.setdefault("experience_weight", 0.7) #toegevoegd door Juliette
+        self.params = params if params is not None else {}
+        for key, value in DEFAULT_PARAMS.items():
+            self.params.setdefault(key, value)
  
     
     def get_income(self):
@@ -80,17 +128,8 @@ class Agent:
             float: Flood probability (0–1).
         """
 
-        rain_prot = house_info.get("rain_protection", 0)
-        river_prot = house_info.get("river_protection", 0)
-
-        # P(rain_damage > rain_prot)
-        rain_prob = max(0.0, min((10 - rain_prot) / 10, 1.0))
-
-        # P(river_damage > river_prot)
-        river_prob = max(0.0, min((12 - river_prot) / 12, 1.0))
-
-        # Calculate average flood probability
-        return (rain_prob + river_prob) / 2 
+        # P(rain_damage > rain_prot) and P(river_damage > river_prot), averaged (lookup table)
+        return flood_probability(house_info.get("rain_protection", 0), house_info.get("river_protection", 0))
     
     def flood_experience_factor(self) -> float: #aangepast door Juliette
         """
@@ -212,37 +251,34 @@ class Agent:
         # Case 1 : no house yet
         
         if self.house is None:
-            # Find the first suitable house
+            # Find the first suitable house (indexed search for a HousingMarket)
+            house_id = first_suitable_house(houses_dict, self.max_mortgage, preferred_rating, current_round)
 
-            for house_id, info in houses_dict.items():
-                # Skip houses that are not available yet in this round
-                if info.get("available_round", 1) > current_round:
-                    continue
-
-                if info["available"] and info["value"] <= self.max_mortgage and info["preferred_rating"] >= preferred_rating:
-                    self.house = house_id
-                    self.mortgage = info["value"]
-                    houses_dict[house_id]["available"] = False
-
-                    # Update protection based on the house 
-                    self.protection["rain_protection"] += info.get("rain_protection", 0)
-                    self.protection["river_protection"] += info.get("river_protection", 0)
-
-                    # Satisfaction penalty when the house rating is lower than preferred rating
-                    house_rating = info.get("preferred_rating", 0)
-                    rating_diff = max(0, self.preferred_rating - house_rating)
-
-                    if rating_diff > 0:
-                        # Each point below preferred gives –1 satisfaction
-                        self.satisfaction -= rating_diff
-                        # print(f"[PMT] Agent {self.ID} – Satisfaction -{rating_diff} due to low house rating ")
-                        #     f"(preferred={self.preferred_rating}, house={house_rating})")
-                                        
-                    # Return suitable house
-                    return house_id
-            
             # Return None if no suitable house is found
-            return None
+            if house_id is None:
+                return None
+
+            info = houses_dict[house_id]
+            self.house = house_id
+            self.mortgage = info["value"]
+            set_available(houses_dict, house_id, False)
+
+            # Update protection based on the house 
+            self.protection["rain_protection"] += info.get("rain_protection", 0)
+            self.protection["river_protection"] += info.get("river_protection", 0)
+
+            # Satisfaction penalty when the house rating is lower than preferred rating
+            house_rating = info.get("preferred_rating", 0)
+            rating_diff = max(0, self.preferred_rating - house_rating)
+
+            if rating_diff > 0:
+                # Each point below preferred gives –1 satisfaction
+                self.satisfaction -= rating_diff
+                # print(f"[PMT] Agent {self.ID} – Satisfaction -{rating_diff} due to low house rating ")
+                #     f"(preferred={self.preferred_rating}, house={house_rating})")
+
+            # Return suitable house
+            return house_id
         
         # Case 2: Relocation (PMT)
         #Only allow relocation in round 4
@@ -253,47 +289,52 @@ class Agent:
         current_house_info = houses_dict[self.house]
         risk_current = self.compute_flood_probability(current_house_info)
 
-        best_house_id = None
-        best_PM = 0.0
+        if isinstance(houses_dict, HousingMarket):
+            # Score all candidate houses in one pass over the market arrays
+            threat = self.threat_appraisal_reloc(current_house_info)
+            best_house_id, best_PM = houses_dict.best_relocation(threat, risk_current, self.max_mortgage, self.house)
+        else:
+            best_house_id = None
+            best_PM = 0.0
 
-        for house_id, info in houses_dict.items():
-            # Skip the current house
-            if house_id == self.house:
-                continue
+            for house_id, info in houses_dict.items():
+                # Skip the current house
+                if house_id == self.house:
+                    continue
 
-            # Skip unavailable houses
-            if not info.get("available", True):
-                continue
+                # Skip unavailable houses
+                if not info.get("available", True):
+                    continue
 
-            # Check affordability
-            if info["value"] > self.max_mortgage:
-                continue
+                # Check affordability
+                if info["value"] > self.max_mortgage:
+                    continue
 
-            # Only consider safer houses
-            risk_current = self.compute_flood_probability(current_house_info)
-            risk_new = self.compute_flood_probability(info)
-            if risk_new >= risk_current:
-                continue
+                # Only consider safer houses
+                risk_current = self.compute_flood_probability(current_house_info)
+                risk_new = self.compute_flood_probability(info)
+                if risk_new >= risk_current:
+                    continue
 
-            # Compute Protection Motivation for relocation to this house
-            PM = self.relocation_PM(current_house_info, info)
-            # print(f"Agent {self.ID} relocation candidate {house_id}: PM={PM:.2f}")
+                # Compute Protection Motivation for relocation to this house
+                PM = self.relocation_PM(current_house_info, info)
+                # print(f"Agent {self.ID} relocation candidate {house_id}: PM={PM:.2f}")
 
-            if PM > best_PM:
-                best_PM = PM
-                best_house_id = house_id
+                if PM > best_PM:
+                    best_PM = PM
+                    best_house_id = house_id
 
         # Decide to relocate if PM exceeds threshold
         if best_house_id is not None and best_PM > relocation_threshold:
             old_house_id = self.house
 
             # Free old house
-            houses_dict[old_house_id]["available"] = True
+            set_available(houses_dict, old_house_id, True)
 
             # Move to new house
             self.house = best_house_id
             self.mortgage = houses_dict[best_house_id]["value"]
-            houses_dict[best_house_id]["available"] = False
+            set_available(houses_dict, best_house_id, False)
 
             # Update protection based on new house
             new_info = houses_dict[best_house_id]
@@ -313,14 +354,8 @@ class Agent:
                          – (benefits of doing nothing, e.g. saving money)
         """
 
-        # Current protection based on house + already adopted measures
-        current_info = {
-            "rain_protection": self.protection.get("rain_protection", 0),
-            "river_protection": self.protection.get("river_protection", 0),
-        }
-
-        # Floor probability current protection
-        flood_prob = self.compute_flood_probability(current_info)
+        # Floor probability current protection (house + already adopted measures)
+        flood_prob = flood_probability(self.protection.get("rain_protection", 0), self.protection.get("river_protection", 0))
 
         # Flood experience factor VERVANGEN JULIETTE
         exp_w = self.params["experience_weight"]
@@ -384,30 +419,12 @@ class Agent:
             return max(0.0, min(coping, 1.0))
         
         # Coping appraisal for other measures
-        # Current protection levels
-        current_rain = self.protection.get("rain_protection", 0)
-        current_river = self.protection.get("river_protection", 0)
-
-        current_info = {
-            "rain_protection": current_rain,
-            "river_protection": current_river
-        }
-
-        # Protection with this measure added
-        new_rain = current_rain + getattr(measure, "protection_rain", 0)
-        new_river = current_river + getattr(measure, "protection_river", 0)
-
-        new_info = {
-            "rain_protection": new_rain,
-            "river_protection": new_river
-        }
-
-        # Risk current vs risk after measure
-        risk_current = self.compute_flood_probability(current_info)
-        risk_new = self.compute_flood_probability(new_info)
-
-        # Calculate risk reduction
-        risk_reduction = max(0.0, risk_current - risk_new)
+        # Risk reduction of current protection vs protection with this measure added (lookup table)
+        risk_reduction = measure_risk_reduction(
+            self.protection.get("rain_protection", 0),
+            self.protection.get("river_protection", 0),
+            measure,
+        )
 
         # Add satisfaction effects
         sat_effect = self.params["sat_effect_bonus"] if getattr(measure, "satisfaction", 0) == 1 else 0.0
@@ -432,14 +449,18 @@ class Agent:
         # Standardize coping appraisal
         return max(0.0, min(coping, 1.0))
     
-    def measures_PM(self, measure, current_round, debug = False):
+    def measures_PM(self, measure, current_round, debug = False, threat=None):
         """
         Computes overall Protection Motivation for adopting a measure.
         Protection Motivation = average of Threat Appraisal and Coping Appraisal,
         scaled to [0–1].
+
+        The threat appraisal does not depend on the measure; pass it as
+        threat to reuse one value for all measures of a round.
         """
 
-        threat = self.threat_appraisal_measures()
+        if threat is None:
+            threat = self.threat_appraisal_measures()
         coping = self.coping_appraisal_measures(measure, current_round)
 
         pm = (threat + coping) / 2.0
@@ -456,6 +477,18 @@ class Agent:
         return max(0.0, min(pm, 1.0))
 
         
+    def has_adopted(self, measure):
+        """
+        Whether the agent adopted this measure at least once.
+
+        Catalogue measures are looked up in the adoption bitmask; measures
+        without an index fall back to comparing names.
+        """
+
+        if measure.index is not None:
+            return bool(self.adopted_mask >> measure.index & 1)
+        return any(m.name == measure.name for (m, r) in self.adopted_measures)
+
     def buy_improvements(self, measures, current_round, measure_threshold=None):
         """
         Evaluate and adopt mitigation measures based on PMT.
@@ -464,16 +497,17 @@ class Agent:
         if measure_threshold is None:
             measure_threshold = self.params["measure_threshold"]
         
-        # Compute PM for all non adopted measures
+        # Compute PM for all non adopted measures (threat is the same for every measure)
+        threat = self.threat_appraisal_measures()
         pm_list = []
         for measure in measures:
 
             # Skip if this measure is already adopted and if measure is not repeatable
             if not measure.repeatable:
-                if any(m.name == measure.name for (m, r) in self.adopted_measures):
+                if self.has_adopted(measure):
                     continue
 
-            pm = self.measures_PM(measure, current_round, debug= False)
+            pm = self.measures_PM(measure, current_round, debug= False, threat=threat)
             pm_list.append((pm, measure))
 
         if not pm_list:
@@ -500,6 +534,8 @@ class Agent:
 
             # Add the measure to the agent's list
             self.adopted_measures.append((measure, current_round))
+            if measure.index is not None:
+                self.adopted_mask |= 1 << measure.index
 
             # Update protections cumulatively
             self.protection["rain_protection"] += getattr(measure, "protection_rain", 0)
@@ -547,7 +583,7 @@ class Agent:
             float: Effective measure cost.
         """
 
-        subsidy_round = 4
+        subsidy_round = SUBSIDY_ROUND
         cost = measure.cost
 
         if current_round == subsidy_round and measure.subsidy_percentage > 0:
@@ -586,5 +622,165 @@ class Agent:
     def __repr__(self):
 
         return (f"Agent(ID={self.ID}, Wealth={self.wealth}, "
-                f"Risk={self.risk_perception}, Exp='{self.experience_level}', "
-                f"Intention={self.intention})")
+                f"Satisfaction={self.satisfaction}, Exp='{self.experience_level}', "
+                f"House={self.house})")
+
+
+# ----------------------------------------------------------------------
+# Batched PMT decisions for a whole population
+# ----------------------------------------------------------------------
+#
+# The functions below apply the measure rules of Agent (measures_PM and
+# buy_improvements) to all agents at once. The population state is any
+# object with one array per agent for wealth, rain_protection,
+# river_protection, wealth_scale, experience_weight and sat_effect_bonus
+# and a flood_experience_factor() method, such as classes.population.Population.
+
+def measure_arrays(measures, current_round):
+    """
+    Collect the measure attributes used in the PMT rules as arrays.
+
+    Args:
+        measures (list[Measure] or MeasureCatalogue): Available measures.
+        current_round (int): Current simulation round.
+
+    Returns:
+        dict: Arrays indexed by measure position.
+    """
+
+    cost = np.array([float(m.cost) for m in measures])
+    subsidy = np.array([float(m.subsidy_percentage) for m in measures])
+
+    # Same rule as Agent.get_effective_cost
+    effective_cost = cost.copy()
+    if current_round == SUBSIDY_ROUND:
+        subsidised = subsidy > 0
+        effective_cost[subsidised] = cost[subsidised] * subsidy[subsidised]
+
+    return {
+        "effective_cost": effective_cost,
+        "rain": np.array([getattr(m, "protection_rain", 0) for m in measures], dtype=np.int64),
+        "river": np.array([getattr(m, "protection_river", 0) for m in measures], dtype=np.int64),
+        "satisfaction": np.array([getattr(m, "satisfaction", 0) for m in measures], dtype=np.int64),
+        "repeatable": np.array([bool(m.repeatable) for m in measures]),
+        "insurance": np.array([m.name == "Flood insurance" for m in measures]),
+    }
+
+
+def measures_PM_matrix(population, measures, current_round):
+    """
+    Protection Motivation per (agent, measure), as Agent.measures_PM.
+
+    Threat appraisal is computed once per agent, coping appraisal for all
+    (agent, measure) pairs at once.
+
+    Args:
+        population: Population state (see above).
+        measures (list[Measure] or MeasureCatalogue): Available measures.
+        current_round (int): Current simulation round.
+
+    Returns:
+        np.ndarray: PM of shape (agents, measures).
+    """
+
+    m = measure_arrays(measures, current_round)
+
+    wealth = population.wealth
+    w = np.maximum(wealth, 0.0)
+    money_pressure = np.clip(1.0 - (w / (w + population.wealth_scale)), 0.0, 1.0)
+    current_risk = flood_probability_array(population.rain_protection, population.river_protection)
+
+    # Threat appraisal (Agent.threat_appraisal_measures)
+    experience = population.experience_weight * population.flood_experience_factor()
+    do_nothing_benefits = 0.05 + 0.15 * money_pressure
+    threat = np.clip(current_risk + experience - do_nothing_benefits, 0.0, 1.0)
+
+    # Coping appraisal (Agent.coping_appraisal_measures)
+    cost = m["effective_cost"][None, :]
+    self_efficacy = np.where(wealth[:, None] >= cost, 1.0, 0.0)
+    total_budget = np.maximum(wealth, 1.0)[:, None]
+    response_cost = np.clip(cost / total_budget, 0.0, 1.0)
+
+    # Other measures: risk reduction plus satisfaction effect
+    new_risk = flood_probability_array(
+        population.rain_protection[:, None] + m["rain"][None, :],
+        population.river_protection[:, None] + m["river"][None, :],
+    )
+    risk_reduction = np.maximum(0.0, current_risk[:, None] - new_risk)
+    sat_effect = np.where(m["satisfaction"][None, :] == 1, population.sat_effect_bonus[:, None], 0.0)
+    response_efficacy = np.clip(risk_reduction + sat_effect, 0.0, 1.0)
+
+    # Flood insurance: more attractive under money pressure
+    insurance_efficacy = np.clip(0.2 + 0.8 * money_pressure, 0.0, 1.0)[:, None]
+    response_efficacy = np.where(m["insurance"][None, :], insurance_efficacy, response_efficacy)
+
+    coping = np.clip(response_efficacy + self_efficacy - response_cost, 0.0, 1.0)
+
+    pm = (threat[:, None] + coping) / 2.0
+    return np.clip(pm, 0.0, 1.0)
+
+
+def adopt_measures(population, measures, current_round, purchase_counts, pm=None, measure_threshold=None):
+    """
+    Greedy measure adoption for all agents, as Agent.buy_improvements.
+
+    Each agent ranks its eligible measures by PM (stable, descending) and
+    walks down the ranking, buying every measure above the threshold it
+    can still afford and deducting the cost as it goes. The walk is done
+    rank by rank for all agents at once.
+
+    Updates wealth, protection levels, satisfaction and purchase_counts
+    of the population in place.
+
+    Args:
+        population: Population state (see above).
+        measures (list[Measure] or MeasureCatalogue): Available measures.
+        current_round (int): Current simulation round.
+        purchase_counts (np.ndarray): Purchases per (agent, measure) so far.
+        pm (np.ndarray, optional): Precomputed measures_PM_matrix().
+        measure_threshold (float or array, optional): PM threshold
+            (default: measure_threshold of the population).
+
+    Returns:
+        list[tuple]: (agent indices, measure indices) bought per rank, in
+        the order the agents bought them.
+    """
+
+    m = measure_arrays(measures, current_round)
+    if pm is None:
+        pm = measures_PM_matrix(population, measures, current_round)
+    if measure_threshold is None:
+        measure_threshold = population.measure_threshold
+
+    # Skip non-repeatable measures that are already adopted
+    eligible = m["repeatable"][None, :] | (purchase_counts == 0)
+
+    # Stable descending sort by PM, ineligible measures at the end
+    order = np.argsort(np.where(eligible, -pm, np.inf), axis=1, kind="stable")
+    rows = np.arange(len(pm))
+    bought = []
+
+    for k in range(order.shape[1]):
+        j = order[:, k]
+        cost = m["effective_cost"][j]
+
+        adopt = (
+            eligible[rows, j]
+            & (pm[rows, j] > measure_threshold)
+            & (population.wealth >= cost)
+        )
+        if not adopt.any():
+            continue
+
+        a = rows[adopt]
+        j = j[adopt]
+
+        population.wealth[a] -= cost[adopt]
+        purchase_counts[a, j] += 1
+        population.rain_protection[a] += m["rain"][j]
+        population.river_protection[a] += m["river"][j]
+        population.satisfaction[a] += m["satisfaction"][j]
+
+        bought.append((a, j))
+
+    return bought
@@ -0,0 +1,249 @@
+"""
+Array-backed housing stock.
+
+A houses_dict stores every house as its own dictionary with a string ID,
+which costs several hundred bytes per house and a deepcopy per generated
+house. HouseTable stores the same fields as typed NumPy columns indexed by
+an integer house ID (0..H-1). String labels such as "h3_g1742" are only
+kept for export (to_dict, label).
+
+Houses generated from the same base house share its active_measures list;
+the table stores the index of that base house per row.
+
+overlay() gives a table with its own availability column on top of the
+shared (read-only) house columns, e.g. one per run or thread.
+
+The table behaves like a read/write houses_dict: table[house_id] returns a
+row view whose ["value"], ["available"], ... access reads and writes the
+columns, so it can be passed to Agent.buy_house and HousingMarket.
+"""
+
+import copy
+
+import numpy as np
+
+
+# Columns and their dtypes, in the key order of a houses_dict entry
+COLUMNS = {
+    "value": np.float64,
+    "available_round": np.int64,
+    "rain_protection": np.int64,
+    "river_protection": np.int64,
+    "preferred_rating": np.int64,
+    "available": np.bool_,
+}
+
+
+class HouseRow:
+    """
+    Dictionary-like view of one house in a HouseTable.
+
+    Reads return Python scalars, writes go to the table columns.
+    """
+
+    __slots__ = ("table", "house_id")
+
+    def __init__(self, table, house_id):
+        self.table = table
+        self.house_id = house_id
+
+    def __getitem__(self, key):
+        if key == "active_measures":
+            return list(self.table.measure_sets[self.table.template[self.house_id]])
+        return self.table.columns[key][self.house_id].item()
+
+    def __setitem__(self, key, value):
+        if key == "active_measures":
+            raise KeyError("active_measures is shared per base house and cannot be set per row")
+        self.table.columns[key][self.house_id] = value
+
+    def __contains__(self, key):
+        return key in COLUMNS or key == "active_measures"
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def keys(self):
+        return [*list(COLUMNS)[:-1], "active_measures", "available"]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"HouseRow({self.house_id}, {self.to_dict()})"
+
+
+class HouseTable:
+    """
+    Housing stock as typed columns with integer house IDs.
+    """
+
+    def __init__(self, value, available_round, rain_protection, river_protection,
+                 preferred_rating, available=None, labels=None, template=None, measure_sets=None):
+        """
+        Args:
+            value, available_round, rain_protection, river_protection,
+            preferred_rating (array-like): One entry per house.
+            available (array-like, optional): Availability per house (default all True).
+            labels (list of str, optional): Export ID per house (default str(house_id)).
+            template (array-like, optional): Index into measure_sets per house.
+            measure_sets (list of lists, optional): active_measures of the base houses.
+        """
+
+        n = len(value)
+        self.columns = {
+            "value": np.asarray(value, dtype=np.float64),
+            "available_round": np.asarray(available_round, dtype=np.int64),
+            "rain_protection": np.asarray(rain_protection, dtype=np.int64),
+            "river_protection": np.asarray(river_protection, dtype=np.int64),
+            "preferred_rating": np.asarray(preferred_rating, dtype=np.int64),
+            "available": np.ones(n, dtype=np.bool_) if available is None else np.asarray(available, dtype=np.bool_),
+        }
+
+        for name, column in self.columns.items():
+            if column.shape != (n,):
+                raise ValueError(f"column {name} has shape {column.shape}, expected ({n},)")
+
+        self.labels = labels
+        self.measure_sets = measure_sets if measure_sets is not None else [[]]
+        self.template = np.zeros(n, dtype=np.int32) if template is None else np.asarray(template, dtype=np.int32)
+
+    @classmethod
+    def from_dict(cls, houses_dict):
+        """
+        Build a table from a houses_dict; its keys become the export labels.
+        """
+
+        infos = list(houses_dict.values())
+        measure_sets = [list(info.get("active_measures", [])) for info in infos]
+
+        return cls(
+            value=[float(info["value"]) for info in infos],
+            available_round=[info.get("available_round", 1) for info in infos],
+            rain_protection=[info.get("rain_protection", 0) for info in infos],
+            river_protection=[info.get("river_protection", 0) for info in infos],
+            preferred_rating=[info["preferred_rating"] for info in infos],
+            available=[bool(info.get("available", True)) for info in infos],
+            labels=[str(house_id) for house_id in houses_dict],
+            template=np.arange(len(infos)),
+            measure_sets=measure_sets,
+        )
+
+    # ------------------------------------------------------------------
+    # Columns
+    # ------------------------------------------------------------------
+
+    @property
+    def value(self):
+        return self.columns["value"]
+
+    @property
+    def available_round(self):
+        return self.columns["available_round"]
+
+    @property
+    def rain_protection(self):
+        return self.columns["rain_protection"]
+
+    @property
+    def river_protection(self):
+        return self.columns["river_protection"]
+
+    @property
+    def preferred_rating(self):
+        return self.columns["preferred_rating"]
+
+    @property
+    def available(self):
+        return self.columns["available"]
+
+    @property
+    def nbytes(self):
+        """
+        Memory of the columns in bytes (labels and measure sets excluded).
+        """
+
+        return sum(column.nbytes for column in self.columns.values()) + self.template.nbytes
+
+    def overlay(self):
+        """
+        Table that shares the house columns of this table but has its own
+        copy of the availability column.
+
+        Several runs (or threads) can buy from overlays of one read-only
+        base table without affecting each other.
+        """
+
+        table = copy.copy(self)
+        table.columns = dict(self.columns)
+        table.columns["available"] = self.available.copy()
+        return table
+
+    # ------------------------------------------------------------------
+    # Dictionary interface
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.columns["value"])
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __contains__(self, house_id):
+        return isinstance(house_id, (int, np.integer)) and 0 <= house_id < len(self)
+
+    def __getitem__(self, house_id):
+        if house_id not in self:
+            raise KeyError(house_id)
+        return HouseRow(self, int(house_id))
+
+    def keys(self):
+        return range(len(self))
+
+    def values(self):
+        return (HouseRow(self, house_id) for house_id in range(len(self)))
+
+    def items(self):
+        return ((house_id, HouseRow(self, house_id)) for house_id in range(len(self)))
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def label(self, house_id):
+        """
+        Export ID of a house (its string ID in the original houses_dict).
+        """
+
+        if house_id is None:
+            return None
+        if self.labels is None:
+            return str(house_id)
+        return self.labels[house_id]
+
+    def to_dict(self):
+        """
+        Convert to a houses_dict keyed by the export labels.
+        """
+
+        rows = zip(
+            *(self.columns[name].tolist() for name in COLUMNS),
+            self.template.tolist(),
+        )
+
+        houses = {}
+        for house_id, (value, available_round, rain, river, rating, available, template) in enumerate(rows):
+            houses[self.label(house_id)] = {
+                "value": value,
+                "available_round": available_round,
+                "rain_protection": rain,
+                "river_protection": river,
+                "preferred_rating": rating,
+                "active_measures": list(self.measure_sets[template]),
+                "available": available,
+            }
+
+        return houses
@@ -0,0 +1,490 @@
+"""
+Indexed housing market.
+
+Agents without a house buy the first house (in houses_dict order) that is
+available in the current round, affordable and has a sufficient rating.
+Scanning the dictionary for every agent costs O(houses) per agent.
+
+HousingMarket wraps a houses_dict and keeps, per (available_round, rating)
+bucket, a segment tree over the houses in insertion order holding the value
+of each available house. The first suitable house is then found in
+logarithmic time and is exactly the house the linear scan would pick.
+
+The market also keeps value, flood probability and availability of all
+houses as arrays. The relocation decision (Case 2 of Agent.buy_house) is
+scored for all candidate houses of one agent, or a block of agents, in one
+NumPy pass over these arrays instead of one relocation_PM call per house.
+
+Flood probability only depends on the (rain_protection, river_protection)
+pair of a house, so the stock falls into a few risk classes. Per class the
+market keeps the available houses ordered by value. Within a class the
+relocation PM can only fall as the value rises, so the best option of a
+class is its cheapest available house and the relocation search only has
+to look at one house per class.
+
+The market can also wrap a HouseTable, in which case its typed columns are
+used directly and house IDs are integers.
+
+The market behaves like the wrapped dictionary (items(), [] access, len),
+so it can be passed wherever a houses_dict is expected. Availability must
+be changed through take()/release() (or set_available()) to keep the index
+and the dictionary in sync.
+"""
+
+import math
+
+import numpy as np
+
+from classes.house_table import HouseTable
+from classes.pmt_tables import flood_probability_array
+
+
+def relocation_PM(threat, risk_current, max_mortgage, value, risk_new):
+    """
+    Vectorised version of Agent.relocation_PM for affordable houses.
+
+    All arguments broadcast against each other, e.g. agent arrays of shape
+    (B, 1) against house arrays of shape (H,); plain floats give a NumPy
+    scalar. Every engine scores relocation options with this function.
+
+    Args:
+        threat: Threat appraisal for relocation (threat_appraisal_reloc).
+        risk_current: Flood probability of the current house.
+        max_mortgage: Maximum mortgage of the agent.
+        value: House values.
+        risk_new: Flood probability of the houses.
+
+    Returns:
+        np.ndarray: Protection Motivation for relocation.
+    """
+
+    # Response efficacy
+    risk_reduction = np.maximum(0.0, risk_current - risk_new)
+
+    # Affordable houses only, so self-efficacy is 1
+    self_efficacy = 1.0
+    response_cost = np.minimum(np.maximum(value / max_mortgage, 0.0), 1.0)
+
+    # minimum/maximum instead of np.clip: much less overhead for single houses
+    coping = np.minimum(np.maximum(risk_reduction + self_efficacy - response_cost, 0.0), 1.0)
+    return (threat + coping) / 2
+
+
+class _MinTree:
+    """
+    Segment tree storing the minimum of its leaves.
+
+    Supports point updates and finding the leftmost leaf with a value at
+    most a given limit, both in O(log n).
+    """
+
+    def __init__(self, values):
+        size = 1
+        while size < max(len(values), 1):
+            size *= 2
+
+        self.size = size
+        self.tree = [math.inf] * (2 * size)
+        self.tree[size:size + len(values)] = values
+
+        for i in range(size - 1, 0, -1):
+            self.tree[i] = min(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def update(self, leaf, value):
+        tree = self.tree
+        i = leaf + self.size
+        tree[i] = value
+
+        i //= 2
+        while i:
+            tree[i] = min(tree[2 * i], tree[2 * i + 1])
+            i //= 2
+
+    def leftmost_at_most(self, limit):
+        """
+        Return the index of the leftmost leaf with value <= limit, or None.
+        """
+
+        tree = self.tree
+        if not tree[1] <= limit:
+            return None
+
+        i = 1
+        while i < self.size:
+            i *= 2
+            if not tree[i] <= limit:
+                i += 1
+
+        return i - self.size
+
+    def min_range(self, lo, hi):
+        """
+        Return the minimum over leaves lo..hi-1.
+        """
+
+        tree = self.tree
+        result = math.inf
+        lo += self.size
+        hi += self.size
+
+        while lo < hi:
+            if lo & 1:
+                result = min(result, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                result = min(result, tree[hi])
+            lo //= 2
+            hi //= 2
+
+        return result
+
+
+class HousingMarket:
+    """
+    Dictionary-like view of a housing stock with an index for house search.
+    """
+
+    def __init__(self, houses_dict):
+        """
+        Build the index from a houses_dict.
+
+        Args:
+            houses_dict (dict or HouseTable): House ID -> house info, as
+                created in data/houses_dict.py. The dictionary (or table) is
+                updated in place when houses are taken or released.
+        """
+
+        self.houses = houses_dict
+
+        if isinstance(houses_dict, HouseTable):
+            # Integer IDs are the positions; the columns are used directly
+            self.ids = range(len(houses_dict))
+            self._position = self.ids
+            self.value = houses_dict.value.tolist()
+            self.value_array = houses_dict.value
+            rain = houses_dict.rain_protection.tolist()
+            river = houses_dict.river_protection.tolist()
+            rounds = houses_dict.available_round.tolist()
+            ratings = houses_dict.preferred_rating.tolist()
+            self.available = houses_dict.available
+        else:
+            infos = list(houses_dict.values())
+            self.ids = list(houses_dict)
+            self._position = {house_id: pos for pos, house_id in enumerate(self.ids)}
+            self.value = [float(info["value"]) for info in infos]
+            self.value_array = np.array(self.value)
+            rain = [info.get("rain_protection", 0) for info in infos]
+            river = [info.get("river_protection", 0) for info in infos]
+            rounds = [info.get("available_round", 1) for info in infos]
+            ratings = [info["preferred_rating"] for info in infos]
+            self.available = np.array([bool(info.get("available", True)) for info in infos])
+
+        # House arrays for the relocation kernel
+        self.risk = flood_probability_array(rain, river)
+
+        # Bucket per (available_round, rating); positions in insertion order
+        self._bucket_of = []
+        self._leaf_of = []
+        positions = {}
+
+        for pos, key in enumerate(zip(rounds, ratings)):
+            bucket = positions.setdefault(key, [])
+            self._bucket_of.append(key)
+            self._leaf_of.append(len(bucket))
+            bucket.append(pos)
+
+        available = self.available.tolist()
+        self._positions = positions
+        self._trees = {
+            key: _MinTree([self.value[p] if available[p] else math.inf for p in bucket])
+            for key, bucket in positions.items()
+        }
+
+        # Risk classes: houses per (rain, river) protection ordered by
+        # (value, position); the tree holds the position of available houses
+        self._class_of = [None] * len(self.ids)
+        self._class_leaf = [0] * len(self.ids)
+        members = {}
+
+        for pos, key in enumerate(zip(rain, river)):
+            members.setdefault(key, []).append(pos)
+
+        self._classes = {}
+        for key, class_positions in members.items():
+            class_positions.sort(key=lambda p: (self.value[p], p))
+            for leaf, pos in enumerate(class_positions):
+                self._class_of[pos] = key
+                self._class_leaf[pos] = leaf
+
+            self._classes[key] = {
+                "risk": float(self.risk[class_positions[0]]),
+                "positions": class_positions,
+                "values": [self.value[p] for p in class_positions],
+                "tree": _MinTree([p if available[p] else math.inf for p in class_positions]),
+            }
+
+    # ------------------------------------------------------------------
+    # Dictionary interface
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, house_id):
+        return self.houses[house_id]
+
+    def __contains__(self, house_id):
+        return house_id in self.houses
+
+    def __iter__(self):
+        return iter(self.houses)
+
+    def __len__(self):
+        return len(self.houses)
+
+    def items(self):
+        return self.houses.items()
+
+    def keys(self):
+        return self.houses.keys()
+
+    def values(self):
+        return self.houses.values()
+
+    # ------------------------------------------------------------------
+    # Availability
+    # ------------------------------------------------------------------
+
+    def set_available(self, house_id, available):
+        """
+        Mark a house as available or taken, in the dictionary and the index.
+        """
+
+        self.houses[house_id]["available"] = available
+
+        pos = self._position[house_id]
+        self.available[pos] = available
+        value = self.value[pos] if available else math.inf
+        self._trees[self._bucket_of[pos]].update(self._leaf_of[pos], value)
+        self._update_class(pos, available)
+
+    def _update_class(self, pos, available):
+        risk_class = self._classes[self._class_of[pos]]
+        risk_class["tree"].update(self._class_leaf[pos], pos if available else math.inf)
+
+    def take(self, house_id):
+        self.set_available(house_id, False)
+
+    def release(self, house_id):
+        self.set_available(house_id, True)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def first_available(self, max_mortgage, preferred_rating=0, current_round=1):
+        """
+        First house in insertion order that the linear scan in
+        Agent.buy_house would buy.
+
+        Args:
+            max_mortgage (float): Maximum house value the agent can afford.
+            preferred_rating (int): Minimum house rating.
+            current_round (int): Current round (houses with a later
+                available_round are skipped).
+
+        Returns:
+            str or None: House ID, or None if no house is suitable.
+        """
+
+        best = None
+        for (available_round, rating), tree in self._trees.items():
+            if available_round > current_round or not rating >= preferred_rating:
+                continue
+
+            leaf = tree.leftmost_at_most(max_mortgage)
+            if leaf is None:
+                continue
+
+            pos = self._positions[(available_round, rating)][leaf]
+            if best is None or pos < best:
+                best = pos
+
+        return None if best is None else self.ids[best]
+
+    def relocation_scores(self, threat, risk_current, max_mortgage, current_house):
+        """
+        Relocation PM for every house, for one agent or a block of agents.
+
+        Houses that are not a candidate regardless of availability (the
+        current house, unaffordable houses and houses that are not safer)
+        score 0. Availability is applied in best_relocation(), so scores of
+        a block stay valid while earlier agents take and release houses.
+
+        Args:
+            threat (float or array): Threat appraisal per agent.
+            risk_current (float or array): Flood probability of the current house.
+            max_mortgage (float or array): Maximum mortgage per agent.
+            current_house (house ID or list): Current house per agent.
+
+        Returns:
+            np.ndarray: Scores of shape (H,) for one agent or (B, H) for a block.
+        """
+
+        block = isinstance(current_house, (list, tuple))
+        if block:
+            threat = np.asarray(threat, dtype=float)[:, None]
+            risk_current = np.asarray(risk_current, dtype=float)[:, None]
+            max_mortgage = np.asarray(max_mortgage, dtype=float)[:, None]
+            current_pos = np.array([self._position[h] for h in current_house])[:, None]
+        else:
+            current_pos = self._position[current_house]
+
+        candidate = (
+            (self.value_array <= max_mortgage)
+            & (self.risk < risk_current)
+            & (np.arange(len(self.ids)) != current_pos)
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pm = relocation_PM(threat, risk_current, max_mortgage, self.value_array, self.risk)
+
+        return np.where(candidate, pm, 0.0)
+
+    def best_relocation(self, threat, risk_current, max_mortgage, current_house, scores=None):
+        """
+        Best relocation option, as the loop in Case 2 of Agent.buy_house.
+
+        Returns the first house (in insertion order) with the highest PM
+        among the available candidates. Without precomputed scores the risk
+        classes are searched, which costs O(classes * log H) instead of O(H).
+
+        Args:
+            scores (np.ndarray, optional): Precomputed row of relocation_scores().
+
+        Returns:
+            tuple: (best_house_id or None, best_PM)
+        """
+
+        if scores is None:
+            return self._best_relocation_by_class(threat, risk_current, max_mortgage, current_house)
+
+        scores = np.where(self.available, scores, 0.0)
+        best = int(np.argmax(scores))
+        best_PM = float(scores[best])
+
+        if best_PM > 0.0:
+            return self.ids[best], best_PM
+        return None, 0.0
+
+    def _best_relocation_by_class(self, threat, risk_current, max_mortgage, current_house):
+        """
+        Relocation search over the risk classes.
+
+        The best PM of a safer class is the PM of its cheapest available
+        house, if affordable. Several houses can share the best PM (equal
+        values, or coping clipped at 1); the loop picks the first of those
+        in insertion order. Because PM does not rise with value, the houses
+        of a class with the best PM are a prefix of its value order, found
+        by binary search, and the first one is a range minimum of positions.
+        """
+
+        # The current house is never a candidate
+        current = self._position[current_house]
+        current_available = bool(self.available[current])
+        if current_available:
+            self._update_class(current, False)
+
+        # Cheapest available house of every safer class, if affordable
+        candidates = []
+        no_house = len(self.ids)
+
+        for risk_class in self._classes.values():
+            if not risk_class["risk"] < risk_current:
+                continue
+
+            leaf = risk_class["tree"].leftmost_at_most(no_house)
+            if leaf is None:
+                continue
+
+            if risk_class["values"][leaf] > max_mortgage:
+                continue
+
+            candidates.append((risk_class, leaf))
+
+        PMs = relocation_PM(
+            threat,
+            risk_current,
+            max_mortgage,
+            np.array([risk_class["values"][leaf] for risk_class, leaf in candidates]),
+            np.array([risk_class["risk"] for risk_class, leaf in candidates]),
+        ).tolist()
+
+        best_PM = 0.0
+        best_classes = []
+        for (risk_class, leaf), PM in zip(candidates, PMs):
+            if PM > best_PM:
+                best_PM = PM
+                best_classes = [(risk_class, leaf)]
+            elif PM == best_PM and PM > 0.0:
+                best_classes.append((risk_class, leaf))
+
+        best_pos = None
+        for risk_class, leaf in best_classes:
+            values = risk_class["values"]
+
+            # End of the prefix of houses in this class that reach best_PM
+            lo, hi = leaf + 1, len(values)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                value = values[mid]
+                if value <= max_mortgage and relocation_PM(
+                    threat, risk_current, max_mortgage, value, risk_class["risk"]
+                ) == best_PM:
+                    lo = mid + 1
+                else:
+                    hi = mid
+
+            pos = risk_class["tree"].min_range(leaf, lo)
+            if best_pos is None or pos < best_pos:
+                best_pos = pos
+
+        if current_available:
+            self._update_class(current, True)
+
+        if best_pos is None:
+            return None, 0.0
+        return self.ids[best_pos], best_PM
+
+
+def first_suitable_house(houses_dict, max_mortgage, preferred_rating=0, current_round=1):
+    """
+    First available, affordable house with sufficient rating.
+
+    Uses the index of a HousingMarket, or scans a plain houses_dict in
+    insertion order.
+
+    Returns:
+        House ID, or None if no house is suitable.
+    """
+
+    if isinstance(houses_dict, HousingMarket):
+        return houses_dict.first_available(max_mortgage, preferred_rating, current_round)
+
+    for house_id, info in houses_dict.items():
+        # Skip houses that are not available yet in this round
+        if info.get("available_round", 1) > current_round:
+            continue
+
+        if info["available"] and info["value"] <= max_mortgage and info["preferred_rating"] >= preferred_rating:
+            return house_id
+
+    return None
+
+
+def set_available(houses_dict, house_id, available):
+    """
+    Mark a house as available or taken in a HousingMarket or plain houses_dict.
+    """
+
+    if isinstance(houses_dict, HousingMarket):
+        houses_dict.set_available(house_id, available)
+    else:
+        houses_dict[house_id]["available"] = available
@@ -1,4 +1,4 @@
-from classes.homeowner_agent import Agent # type: ignore
+from classes.homeowner_agent import Agent, shared_params # type: ignore
 import matplotlib.pyplot as plt
 import numpy as np
 import random
@@ -30,6 +30,7 @@ def initialise_agents():
     ]
 
     agents = []
+    params = shared_params()
 
     for p in players_data:
         agent = Agent(
@@ -38,7 +39,8 @@ def initialise_agents():
             income=p["income"],
             experience_level="Nooit",
             self_efficacy=0.5,
-            house=None
+            house=None,
+            params=params
         )
 
         agent.max_mortgage = p["max_mortgage"]
@@ -49,7 +51,7 @@ def initialise_agents():
     return agents
 
 
-def initialise_agents_n(n=1000, seed=42):
+def initialise_agents_n(n=1000, seed=42, params=None, rng=None):
     """
     Create a heterogeneous population of household agents.
 
@@ -61,27 +63,38 @@ def initialise_agents_n(n=1000, seed=42):
     Args:
         n (int): Number of agents to generate.
         seed (int): Random seed for reproducibility.
+        params (dict, optional): Parameter overrides for the whole
+            population; all agents share one parameter dict.
+        rng (random.Random, optional): Private generator to draw from
+            (default: the global random module). It is seeded with seed;
+            with seed=None its current state is used (e.g. a RunStreams
+            stream).
 
     Returns:
         list[Agent]: List of n heterogeneous household agents.
     """
 
-    random.seed(seed)
+    if rng is None:
+        rng = random
+    if seed is not None:
+        rng.seed(seed)
 
     agents = []
+    params = shared_params(params)
     for i in range(1, n + 1):
-        income = random.choice([30000, 35000, 40000, 45000, 50000, 75000])
-        start_savings = random.choice([0, 2000, 5000, 15000, 30000, 50000, 80000])
-        max_mortgage = random.choice([80000, 110000, 130000, 170000, 200000, 300000])
-        preferred_rating = random.randint(3, 8)
+        income = rng.choice([30000, 35000, 40000, 45000, 50000, 75000])
+        start_savings = rng.choice([0, 2000, 5000, 15000, 30000, 50000, 80000])
+        max_mortgage = rng.choice([80000, 110000, 130000, 170000, 200000, 300000])
+        preferred_rating = rng.randint(3, 8)
 
         agent = Agent(
-            ID=f"a{i}",
+            ID=i,
             wealth=float(start_savings),
             income=float(income),
             experience_level="Nooit",
             self_efficacy=0.5,
-            house=None
+            house=None,
+            params=params
         )
 
         agent.max_mortgage = float(max_mortgage)
@@ -1,3 +1,6 @@
+import copy
+
+
 class Measure():
     """
     Flood adaptation or protection measure available to household agents.
@@ -30,9 +33,88 @@ class Measure():
         self.remaining_rounds = repeatable
         self.subsidy_percentage =  subsidy_percentage
 
+        # Position in the MeasureCatalogue (set by the catalogue)
+        self.index = None
+
     def __repr__(self):
         return f"Measure({self.name!r})"
 
+
+class MeasureCatalogue:
+    """
+    Indexed list of measures.
+
+    Every measure gets its position as integer index, so adoption can be
+    stored as a bitmask per agent (bit i set = measure i adopted at least
+    once). Policy variants share the indexes and the unchanged Measure
+    objects of the catalogue they are made from.
+    """
+
+    def __init__(self, measures):
+        self.measures = list(measures)
+        self._index_of = {}
+        self._variants = {}
+
+        for index, measure in enumerate(self.measures):
+            measure.index = index
+            self._index_of.setdefault(measure.name, index)
+
+    def __len__(self):
+        return len(self.measures)
+
+    def __iter__(self):
+        return iter(self.measures)
+
+    def __getitem__(self, index):
+        return self.measures[index]
+
+    def find(self, name):
+        """
+        Return the measure with a matching name.
+        Raises ValueError if the measure is not found.
+        """
+
+        if name not in self._index_of:
+            raise ValueError(f"Measure with name='{name}' not found.")
+        return self.measures[self._index_of[name]]
+
+    def names(self, mask):
+        """
+        Names of the measures whose bit is set in an adoption bitmask.
+        """
+
+        return [m.name for m in self.measures if mask >> m.index & 1]
+
+    def variant(self, changes):
+        """
+        Catalogue with some measure attributes changed (e.g. a subsidy).
+
+        Only the changed measures are copied; the others are shared with
+        this catalogue. Variants are cached per set of changes, so they
+        must not be modified afterwards.
+
+        Args:
+            changes (dict): Measure name -> {attribute: new value}.
+
+        Returns:
+            MeasureCatalogue: Catalogue with the same indexes.
+        """
+
+        key = tuple(sorted((name, tuple(sorted(attrs.items()))) for name, attrs in changes.items()))
+        if key in self._variants:
+            return self._variants[key]
+
+        measures = list(self.measures)
+        for name, attrs in changes.items():
+            changed = copy.copy(self.find(name))
+            for attr, value in attrs.items():
+                setattr(changed, attr, value)
+            measures[changed.index] = changed
+
+        variant = MeasureCatalogue(measures)
+        self._variants[key] = variant
+        return variant
+
 # List of available flood adaptation measures
 measures = [
     Measure("Personal improvements",         cost= 12000, repeatable= True, rain_protection=0, river_protection=0, satisfaction=1, subsidy_percentage=0.0),
@@ -47,4 +129,5 @@ measures = [
     Measure("Rain barrel",                   cost=20000, repeatable= False, rain_protection=1, river_protection=0, satisfaction=1, subsidy_percentage=0.0),
 ]
 
-
+# Indexed view of the measures above
+catalogue = MeasureCatalogue(measures)
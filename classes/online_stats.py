@@ -0,0 +1,258 @@
+"""
+Streaming statistics over replicates.
+
+RunningStats keeps the count, mean and sum of squared deviations of a
+stream of values with Welford's update, so the mean and standard
+deviation are available at any moment without storing the values.
+Accumulators of separate workers can be combined with merge() (Chan et
+al.'s parallel update).
+
+ReplicateSummary combines one RunningStats per output metric with summed
+counters (e.g. purchases per measure), so a runner can fold in each
+replicate as soon as it is finished: memory is constant in the number of
+replicates and agents.
+
+CountSketch is a mergeable quantile sketch for discrete outputs: it keeps
+the count of every distinct value. Satisfaction only takes a few dozen
+integer values, so this is smaller than a t-digest or KLL sketch and its
+quantiles and moments are exact. SketchCollector keeps one CountSketch
+per key (e.g. run and round); collectors of separate workers are merged
+without keeping any agent-level rows.
+"""
+
+from collections import Counter
+from math import floor, sqrt
+
+
+class RunningStats:
+    """
+    Welford accumulator for the mean and variance of a stream of values.
+    """
+
+    __slots__ = ("n", "mean", "_m2")
+
+    def __init__(self, values=()):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        for x in values:
+            self.add(x)
+
+    def add(self, x):
+        """
+        Add one value.
+        """
+
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+
+    def merge(self, other):
+        """
+        Add all values of another accumulator.
+        """
+
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self._m2 += other._m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def variance(self):
+        """
+        Sample variance (0.0 for fewer than two values).
+        """
+
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def stdev(self):
+        """
+        Sample standard deviation (0.0 for fewer than two values).
+        """
+
+        return sqrt(self.variance)
+
+    def __repr__(self):
+        return f"RunningStats(n={self.n}, mean={self.mean}, stdev={self.stdev})"
+
+
+class ReplicateSummary:
+    """
+    Running summary of the replicates of one scenario.
+    """
+
+    def __init__(self, metrics, counters=()):
+        """
+        Args:
+            metrics (iterable of str): Scalar outputs per replicate to track
+                with a RunningStats.
+            counters (iterable of str): Counter outputs per replicate to sum.
+        """
+
+        self.n = 0
+        self.metrics = {name: RunningStats() for name in metrics}
+        self.counters = {name: Counter() for name in counters}
+
+    def add(self, stats):
+        """
+        Fold in the output dictionary of one replicate.
+        """
+
+        self.n += 1
+        for name, running in self.metrics.items():
+            running.add(stats[name])
+        for name, counter in self.counters.items():
+            counter.update(stats[name])
+
+    def __getitem__(self, name):
+        return self.metrics[name]
+
+    def __len__(self):
+        return self.n
+
+
+class CountSketch:
+    """
+    Exact sketch of a stream of discrete values: the count of every value.
+    """
+
+    __slots__ = ("counts",)
+
+    def __init__(self, values=()):
+        self.counts = Counter()
+        self.update(values)
+
+    def update(self, values):
+        """
+        Add values (an iterable or NumPy array).
+        """
+
+        self.counts.update(values.tolist() if hasattr(values, "tolist") else values)
+
+    def add(self, value, count=1):
+        """
+        Add count occurrences of value.
+        """
+
+        self.counts[value] += count
+
+    def merge(self, other):
+        """
+        Add all values of another sketch.
+        """
+
+        self.counts.update(other.counts)
+
+    @property
+    def n(self):
+        return sum(self.counts.values())
+
+    @property
+    def mean(self):
+        """
+        Mean (0.0 for an empty sketch).
+        """
+
+        n = self.n
+        return sum(v * c for v, c in self.counts.items()) / n if n else 0.0
+
+    @property
+    def variance(self):
+        """
+        Sample variance (0.0 for fewer than two values).
+        """
+
+        n = self.n
+        if n < 2:
+            return 0.0
+        m = self.mean
+        return sum(c * (v - m) ** 2 for v, c in self.counts.items()) / (n - 1)
+
+    @property
+    def stdev(self):
+        return sqrt(self.variance)
+
+    def quantile(self, q):
+        """
+        Quantile q (0-1) with linear interpolation, as np.percentile(values, 100 * q).
+        """
+
+        n = self.n
+        if n == 0:
+            raise ValueError("quantile of an empty sketch")
+
+        h = q * (n - 1)
+        lo = floor(h)
+        t = h - lo
+        a = b = None
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if a is None and seen > lo:
+                a = value
+            if seen > min(lo + 1, n - 1):
+                b = value
+                break
+
+        # Same interpolation formula as NumPy, so the results are identical
+        diff = b - a
+        return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+    def __repr__(self):
+        return f"CountSketch(n={self.n}, values={len(self.counts)})"
+
+
+class SketchCollector:
+    """
+    One CountSketch per key, e.g. (scenario_id, ..., seed, round).
+    """
+
+    def __init__(self):
+        self.sketches = {}
+
+    def sketch(self, key):
+        """
+        Sketch of key (created empty if needed).
+        """
+
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = CountSketch()
+        return sketch
+
+    def add(self, key, values):
+        """
+        Add values to the sketch of key.
+        """
+
+        self.sketch(key).update(values)
+
+    def merge(self, other):
+        """
+        Add all sketches of another collector.
+        """
+
+        for key, sketch in other.sketches.items():
+            self.sketch(key).merge(sketch)
+
+    def regroup(self, key_of):
+        """
+        Collector with the sketches merged per key_of(key), e.g. pooled
+        over seeds with key_of=lambda k: (k[0], k[-1]).
+        """
+
+        pooled = SketchCollector()
+        for key, sketch in self.sketches.items():
+            pooled.sketch(key_of(key)).merge(sketch)
+        return pooled
+
+    def items(self):
+        return self.sketches.items()
+
+    def __len__(self):
+        return len(self.sketches)
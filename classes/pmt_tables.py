@@ -0,0 +1,141 @@
+"""
+Lookup tables for the PMT risk terms.
+
+Flood probability only depends on the integer rain and river protection
+levels, and the risk reduction of a measure only on the protection state
+and the protection the measure adds. Both are computed once per level and
+looked up afterwards, instead of being recomputed (with temporary dicts)
+for every agent, measure and house.
+
+Outside 0..RAIN_SATURATION (rain) and 0..RIVER_SATURATION (river) the
+probability is clipped, so levels are clamped into these ranges before
+the lookup. The tables hold the values of the original expressions, so
+results are bit-identical. Non-integer levels fall back to the expression.
+
+flood_probability_array looks up whole arrays of protection levels (the
+population engine and the housing market); it uses the same table, so
+every engine shares this one definition of the flood probability.
+"""
+
+import numpy as np
+
+
+# Protection level at which the flood probability reaches 0
+RAIN_SATURATION = 10
+RIVER_SATURATION = 12
+
+
+def _flood_probability(rain_prot, river_prot):
+    """
+    Flood probability as in Agent.compute_flood_probability.
+    """
+
+    # P(rain_damage > rain_prot)
+    rain_prob = max(0.0, min((RAIN_SATURATION - rain_prot) / RAIN_SATURATION, 1.0))
+
+    # P(river_damage > river_prot)
+    river_prob = max(0.0, min((RIVER_SATURATION - river_prot) / RIVER_SATURATION, 1.0))
+
+    return (rain_prob + river_prob) / 2
+
+
+FLOOD_PROBABILITY = [
+    [_flood_probability(rain, river) for river in range(RIVER_SATURATION + 1)]
+    for rain in range(RAIN_SATURATION + 1)
+]
+
+
+def flood_probability(rain_prot, river_prot):
+    """
+    Average flood probability (0–1) for the given protection levels.
+    """
+
+    if type(rain_prot) is int and type(river_prot) is int:
+        rain = min(max(rain_prot, 0), RAIN_SATURATION)
+        river = min(max(river_prot, 0), RIVER_SATURATION)
+        return FLOOD_PROBABILITY[rain][river]
+
+    return _flood_probability(rain_prot, river_prot)
+
+
+_FLOOD_PROBABILITY_TABLE = np.array(FLOOD_PROBABILITY)
+_flood_probability_ufunc = np.frompyfunc(_flood_probability, 2, 1)
+
+
+def flood_probability_array(rain_prot, river_prot):
+    """
+    flood_probability for arrays of protection levels (broadcast).
+
+    Returns:
+        np.ndarray: Average flood probability (0–1) per element.
+    """
+
+    rain = np.asarray(rain_prot)
+    river = np.asarray(river_prot)
+
+    if rain.dtype.kind in "iu" and river.dtype.kind in "iu":
+        rain = np.clip(rain, 0, RAIN_SATURATION)
+        river = np.clip(river, 0, RIVER_SATURATION)
+        return _FLOOD_PROBABILITY_TABLE[rain, river]
+
+    return _flood_probability_ufunc(rain, river).astype(float)
+
+
+class _RiskReductionTable:
+    """
+    Risk reduction max(0, P(state) - P(state + delta)) for one delta.
+
+    Below -|delta| (above saturation + |delta|) neither the state nor the
+    state plus delta is inside the unclipped range, so the reduction there
+    equals the reduction at the border and levels can be clamped.
+    """
+
+    def __init__(self, d_rain, d_river):
+        self.rain_lo, self.rain_hi = -abs(d_rain), RAIN_SATURATION + abs(d_rain)
+        self.river_lo, self.river_hi = -abs(d_river), RIVER_SATURATION + abs(d_river)
+
+        self.table = [
+            [
+                max(0.0, _flood_probability(rain, river) - _flood_probability(rain + d_rain, river + d_river))
+                for river in range(self.river_lo, self.river_hi + 1)
+            ]
+            for rain in range(self.rain_lo, self.rain_hi + 1)
+        ]
+
+    def __call__(self, rain_prot, river_prot):
+        rain = min(max(rain_prot, self.rain_lo), self.rain_hi) - self.rain_lo
+        river = min(max(river_prot, self.river_lo), self.river_hi) - self.river_lo
+        return self.table[rain][river]
+
+
+_RISK_REDUCTION = {}
+
+
+def risk_reduction(rain_prot, river_prot, d_rain, d_river):
+    """
+    Reduction of flood probability when protection rises by (d_rain, d_river).
+
+    Same value as max(0, P(rain, river) - P(rain + d_rain, river + d_river)).
+    """
+
+    if not all(type(x) is int for x in (rain_prot, river_prot, d_rain, d_river)):
+        return max(0.0, _flood_probability(rain_prot, river_prot) - _flood_probability(rain_prot + d_rain, river_prot + d_river))
+
+    table = _RISK_REDUCTION.get((d_rain, d_river))
+    if table is None:
+        table = _RISK_REDUCTION[(d_rain, d_river)] = _RiskReductionTable(d_rain, d_river)
+
+    return table(rain_prot, river_prot)
+
+
+def measure_risk_reduction(rain_prot, river_prot, measure):
+    """
+    Risk reduction of adding a measure to the given protection state.
+    """
+
+    return risk_reduction(
+        rain_prot,
+        river_prot,
+        getattr(measure, "protection_rain", 0),
+        getattr(measure, "protection_river", 0),
+    )
@@ -0,0 +1,528 @@
+"""
+Struct-of-arrays population engine for the household agents.
+
+The object path runs ``agent.step(...)`` for every Agent, which costs many
+small Python calls per agent per round. The Population class keeps the
+same state (wealth, income, mortgage, satisfaction, protection and
+adopted measures) as NumPy arrays and runs a whole round for all agents
+with batched operations.
+
+Only the housing market step stays sequential: agents buy and leave houses
+one after another, so an agent can only take a house that earlier agents
+in the same round left available. Everything else an agent does in a step
+only touches its own state and is computed for all agents at once.
+
+Results are identical to the object path (see Population.to_agents).
+
+Several independent replicates can be stacked into one Population
+(Population.from_replicates). Every replicate keeps its own housing market
+and flood draws, while all other rules run over the (replicate, agent)
+state in one batch.
+"""
+
+import numpy as np
+
+from classes.homeowner_agent import Agent, adopt_measures
+from classes.housing_market import HousingMarket, first_suitable_house, relocation_PM, set_available
+from classes.pmt_tables import flood_probability
+
+
+# Decision rules that are fixed in Agent.step / Agent.buy_house
+RELOCATION_ROUND = 4
+RELOCATION_THRESHOLD = 0.6
+DECAY_ROUND = 3
+
+# Maximum number of (agent, house) relocation scores computed in one block
+RELOCATION_BLOCK_CELLS = 2 ** 22
+
+# Larger markets are searched per risk class instead of scored in blocks
+RELOCATION_BLOCK_MAX_HOUSES = 10_000
+
+EXPERIENCE_FACTOR = {
+    "Nooit": 0.0,
+    "Een keer": 0.25,
+    "Vaker dan een keer": 0.75,
+}
+
+
+def _house_flood_probability(house_info):
+    """
+    Flood probability of a house, as Agent.compute_flood_probability.
+    """
+
+    return flood_probability(house_info.get("rain_protection", 0), house_info.get("river_protection", 0))
+
+
+class Population:
+    """
+    Household population stored as one array per state variable.
+
+    Row i of every array belongs to agent i of the list the population was
+    built from. Measures are tracked per position in the measures list that
+    is passed to step(), so the same list (or a policy copy with the same
+    order) must be used in every round.
+    """
+
+    def __init__(self, agents):
+        """
+        Build the array state from a list of initialised agents.
+
+        Args:
+            agents (list[Agent]): Agents as created by the initialisation functions.
+        """
+
+        n = len(agents)
+
+        self.ids = [a.ID for a in agents]
+        self.experience_level = [a.experience_level for a in agents]
+        self.self_efficacy = [a.self_efficacy for a in agents]
+        self.params = [a.params for a in agents]
+
+        self.wealth = np.array([float(a.wealth) for a in agents])
+        self.income = np.array([float(a.income) for a in agents])
+        self.max_mortgage = np.array([float(a.max_mortgage) for a in agents])
+        self.preferred_rating = np.array([a.preferred_rating for a in agents], dtype=np.int64)
+
+        self.has_mortgage = np.array([a.mortgage is not None for a in agents])
+        self.mortgage = np.array([float(a.mortgage or 0.0) for a in agents])
+
+        self.satisfaction = np.array([a.satisfaction for a in agents], dtype=np.int64)
+        self.rain_protection = np.array([a.protection["rain_protection"] for a in agents], dtype=np.int64)
+        self.river_protection = np.array([a.protection["river_protection"] for a in agents], dtype=np.int64)
+
+        # House per agent (None when the agent has not bought a house yet)
+        self.house = [a.house for a in agents]
+
+        # Model parameters per agent
+        self.damage_costs = np.array([float(p["damage_costs"]) for p in self.params])
+        self.wealth_scale = np.array([max(1.0, float(p.get("wealth_scale", 100000))) for p in self.params])
+        self.measure_threshold = np.array([float(p["measure_threshold"]) for p in self.params])
+        self.sat_effect_bonus = np.array([float(p["sat_effect_bonus"]) for p in self.params])
+        self.experience_weight = np.array([float(p["experience_weight"]) for p in self.params])
+
+        # Experience: fixed per scenario, or dynamic from realised damage
+        scenario = [p.get("experience_source", "dynamic") == "scenario" for p in self.params]
+        self.fixed_experience = np.array(scenario)
+        self.scenario_experience = np.array(
+            [float(EXPERIENCE_FACTOR.get(a.experience_level, 0.0)) for a in agents]
+        )
+        self.n_damage_records = np.array([len(a.damage_history) for a in agents], dtype=np.int64)
+        self.n_flooded = np.array(
+            [sum(1 for d in a.damage_history if d.get("damage_cost", 0) > 0) for a in agents],
+            dtype=np.int64,
+        )
+
+        # Histories, one array per round
+        self.wealth_history = [a.wealth_history for a in agents]
+        self.satisfaction_rounds = []
+        self.wealth_rounds = []
+        self.damage_rounds = []
+
+        # Adoption state: purchase counts per (agent, measure) and the purchase log
+        self.measures = None
+        self.purchase_counts = None
+        self.purchase_log = []
+
+        # Replicate per row (a single population is one replicate)
+        self.replicate = np.zeros(n, dtype=np.int64)
+        self.replicate_sizes = [n]
+
+        self.n = n
+
+    @classmethod
+    def from_agents(cls, agents):
+        """
+        Create a Population from a list of agents.
+        """
+
+        return cls(agents)
+
+    @classmethod
+    def from_replicates(cls, agent_lists):
+        """
+        Stack the agents of several independent replicates into one Population.
+
+        Rows are ordered replicate by replicate. step() then expects one
+        houses_dict and one flood result per replicate.
+
+        Args:
+            agent_lists (list[list[Agent]]): Agents per replicate.
+
+        Returns:
+            Population: Batched population with R replicates.
+        """
+
+        sizes = [len(agents) for agents in agent_lists]
+        population = cls([a for agents in agent_lists for a in agents])
+
+        population.replicate = np.repeat(np.arange(len(sizes)), sizes)
+        population.replicate_sizes = sizes
+        return population
+
+    @property
+    def n_replicates(self):
+        return len(self.replicate_sizes)
+
+    @property
+    def shape(self):
+        """
+        (replicate, agent) shape of the state arrays.
+        """
+
+        if len(set(self.replicate_sizes)) > 1:
+            raise ValueError("Replicates have different numbers of agents")
+        return (self.n_replicates, self.replicate_sizes[0])
+
+    def as_tensor(self, values):
+        """
+        View a per-row state array as a (replicate, agent) tensor.
+
+        Example:
+            population.as_tensor(population.satisfaction).mean(axis=1)
+        """
+
+        return np.asarray(values).reshape(self.shape)
+
+    def _per_row(self, flood_results):
+        """
+        Turn one flood result per replicate into one value per row.
+        """
+
+        if isinstance(flood_results, dict):
+            return flood_results
+
+        rain = np.array([f.get("rain_damage", 0) for f in flood_results])
+        river = np.array([f.get("river_damage", 0) for f in flood_results])
+        return {"rain_damage": rain[self.replicate], "river_damage": river[self.replicate]}
+
+    # ------------------------------------------------------------------
+    # Appraisal rules (vectorised versions of the Agent methods)
+    # ------------------------------------------------------------------
+
+    def flood_experience_factor(self):
+        """
+        Vectorised version of Agent.flood_experience_factor.
+        """
+
+        n = np.maximum(self.n_damage_records, 1)
+        dynamic = np.where(
+            self.n_damage_records > 0,
+            np.clip(self.n_flooded / n, 0.0, 1.0),
+            0.0,
+        )
+        return np.where(self.fixed_experience, self.scenario_experience, dynamic)
+
+    # ------------------------------------------------------------------
+    # Step components
+    # ------------------------------------------------------------------
+
+    def _buy_first_house(self, i, houses_dict, current_round, preferred_rating=0):
+        """
+        Case 1 of Agent.buy_house for agent i.
+        """
+
+        house_id = first_suitable_house(houses_dict, float(self.max_mortgage[i]), preferred_rating, current_round)
+        if house_id is None:
+            return None
+
+        info = houses_dict[house_id]
+        self.house[i] = house_id
+        self.has_mortgage[i] = True
+        self.mortgage[i] = float(info["value"])
+        set_available(houses_dict, house_id, False)
+
+        self.rain_protection[i] += info.get("rain_protection", 0)
+        self.river_protection[i] += info.get("river_protection", 0)
+
+        rating_diff = max(0, self.preferred_rating[i] - info.get("preferred_rating", 0))
+        self.satisfaction[i] -= rating_diff
+        return house_id
+
+    def relocation_threat(self, idx, risk_current, experience):
+        """
+        Vectorised version of Agent.threat_appraisal_reloc for agents idx.
+        """
+
+        stay_benefits = 0.2 + 0.5 * np.clip(self.satisfaction[idx], 0.0, 1.0)
+        threat = risk_current + risk_current + experience[idx] - stay_benefits
+        return np.clip(threat, 0.0, 1.0)
+
+    def _relocation_block(self, i, market, experience):
+        """
+        Relocation scores of agent i and the next agents of the same
+        replicate that own a house, computed as one block.
+
+        An agent's current house, wealth state and satisfaction do not change
+        before its own turn in the housing step, so the scores stay valid;
+        availability is applied when each agent decides.
+        """
+
+        size = max(1, RELOCATION_BLOCK_CELLS // max(len(market), 1))
+        end = int(np.searchsorted(self.replicate, self.replicate[i], side="right"))
+
+        idx = [j for j in range(i, end) if self.house[j] is not None][:size]
+        houses = [self.house[j] for j in idx]
+
+        risk_current = market.risk[[market._position[h] for h in houses]]
+        threat = self.relocation_threat(idx, risk_current, experience)
+        scores = market.relocation_scores(threat, risk_current, self.max_mortgage[idx], houses)
+
+        return dict(zip(idx, scores))
+
+    def _relocate(self, i, houses_dict, experience, scores=None):
+        """
+        Case 2 of Agent.buy_house (relocation with PMT) for agent i.
+        """
+
+        current_id = self.house[i]
+        current_info = houses_dict[current_id]
+        max_mortgage = float(self.max_mortgage[i])
+        risk_current = _house_flood_probability(current_info)
+
+        # Threat appraisal for relocation only depends on the current house
+        threat = float(self.relocation_threat(i, risk_current, experience))
+
+        if isinstance(houses_dict, HousingMarket):
+            best_house_id, best_PM = houses_dict.best_relocation(threat, risk_current, max_mortgage, current_id, scores)
+        else:
+            best_house_id, best_PM = self._scan_relocation(i, houses_dict, threat, risk_current)
+
+        if best_house_id is not None and best_PM > RELOCATION_THRESHOLD:
+            set_available(houses_dict, current_id, True)
+
+            new_info = houses_dict[best_house_id]
+            self.house[i] = best_house_id
+            self.mortgage[i] = float(new_info["value"])
+            set_available(houses_dict, best_house_id, False)
+
+            self.rain_protection[i] = new_info.get("rain_protection", 0)
+            self.river_protection[i] = new_info.get("river_protection", 0)
+            return best_house_id
+
+        return None
+
+    def _scan_relocation(self, i, houses_dict, threat, risk_current):
+        """
+        Relocation search over a plain houses_dict, one house at a time.
+        """
+
+        current_id = self.house[i]
+        max_mortgage = float(self.max_mortgage[i])
+
+        best_house_id = None
+        best_PM = 0.0
+
+        for house_id, info in houses_dict.items():
+            if house_id == current_id:
+                continue
+            if not info.get("available", True):
+                continue
+            if info["value"] > max_mortgage:
+                continue
+
+            risk_new = _house_flood_probability(info)
+            if risk_new >= risk_current:
+                continue
+
+            PM = float(relocation_PM(threat, risk_current, max_mortgage, info["value"], risk_new))
+            if PM > best_PM:
+                best_PM = PM
+                best_house_id = house_id
+
+        return best_house_id, best_PM
+
+    def buy_houses(self, houses_dict, current_round):
+        """
+        Housing market step for all agents, in agent order.
+
+        Agents without a house buy the first suitable one; in the
+        relocation round agents with a house evaluate relocation. With a
+        HousingMarket the relocation options are scored in blocks of agents,
+        or searched per risk class when the market is large.
+
+        houses_dict may be a list with one market per replicate.
+        """
+
+        relocation = current_round == RELOCATION_ROUND
+        experience = self.flood_experience_factor() if relocation else None
+
+        markets = houses_dict if isinstance(houses_dict, (list, tuple)) else None
+        replicate = self.replicate.tolist()
+        scores = {}
+
+        for i in range(self.n):
+            market = markets[replicate[i]] if markets is not None else houses_dict
+
+            if self.house[i] is None:
+                self._buy_first_house(i, market, current_round)
+            elif relocation:
+                if (
+                    isinstance(market, HousingMarket)
+                    and len(market) <= RELOCATION_BLOCK_MAX_HOUSES
+                    and i not in scores
+                ):
+                    scores.update(self._relocation_block(i, market, experience))
+                self._relocate(i, market, experience, scores.pop(i, None))
+
+    def pay_tax(self):
+        """
+        Pay a fixed fraction of the mortgage, as Agent.pay_tax.
+        """
+
+        payment = np.where(self.has_mortgage, 0.1 * self.mortgage, 0.0)
+        self.wealth -= payment
+        self.mortgage -= payment
+
+    def buy_improvements(self, measures, current_round):
+        """
+        Adopt measures for all agents, as Agent.buy_improvements.
+
+        Uses the batched decision functions next to Agent
+        (measures_PM_matrix and adopt_measures) and logs the purchases.
+        """
+
+        if self.measures is None:
+            self.measures = list(measures)
+            self.purchase_counts = np.zeros((self.n, len(self.measures)), dtype=np.int64)
+
+        for a, j in adopt_measures(self, measures, current_round, self.purchase_counts):
+            self.purchase_log.append((current_round, a, j))
+
+    def check_damage(self, flood_results):
+        """
+        Apply flood damage and update wealth and satisfaction, as Agent.check_damage.
+
+        flood_results values may be scalars or arrays with one value per agent.
+        """
+
+        rain_diff = np.maximum(0, np.asarray(flood_results.get("rain_damage", 0)) - self.rain_protection)
+        river_diff = np.maximum(0, np.asarray(flood_results.get("river_damage", 0)) - self.river_protection)
+
+        self.satisfaction -= rain_diff + river_diff
+
+        total = self.damage_costs * (rain_diff + river_diff)
+        self.wealth -= total
+
+        self.n_damage_records += 1
+        self.n_flooded += total > 0
+        self.damage_rounds.append((rain_diff, river_diff))
+
+    def step(self, houses_dict, measures, flood_results, current_round):
+        """
+        Execute one simulation round for all agents.
+
+        Same order of operations as Agent.step. For a batched population,
+        houses_dict and flood_results are lists with one entry per replicate.
+        """
+
+        flood_results = self._per_row(flood_results)
+
+        self.wealth += self.income
+        self.buy_houses(houses_dict, current_round)
+        self.pay_tax()
+        self.buy_improvements(measures, current_round)
+        self.check_damage(flood_results)
+        self.wealth_rounds.append(self.wealth.copy())
+
+        # Round 3 protection decay
+        if current_round == DECAY_ROUND:
+            self.rain_protection -= 1
+            self.river_protection -= 2
+
+        # Debt reduces satisfaction
+        self.satisfaction -= self.wealth < 0
+
+        self.satisfaction_rounds.append(self.satisfaction.copy())
+
+    # ------------------------------------------------------------------
+    # Conversion back to agents
+    # ------------------------------------------------------------------
+
+    def adopted_measures(self, rows=None):
+        """
+        Rebuild every agent's adopted_measures list from the purchase log.
+
+        Args:
+            rows (range, optional): Rows to rebuild (default: all).
+
+        Returns:
+            list[list[tuple[Measure, int]]]: Purchases per agent in order.
+        """
+
+        if rows is None:
+            rows = range(self.n)
+
+        adopted = [[] for _ in rows]
+        for round_nr, agent_idx, measure_idx in self.purchase_log:
+            selected = (agent_idx >= rows.start) & (agent_idx < rows.stop)
+            for i, j in zip(agent_idx[selected].tolist(), measure_idx[selected].tolist()):
+                adopted[i - rows.start].append((self.measures[j], round_nr))
+        return adopted
+
+    def to_agents(self, rows=None):
+        """
+        Convert the population back to Agent objects.
+
+        Args:
+            rows (range, optional): Rows to convert (default: all).
+
+        Returns:
+            list[Agent]: Agents with the same state as after running the
+            object path for the same rounds.
+        """
+
+        if rows is None:
+            rows = range(self.n)
+
+        adopted = self.adopted_measures(rows)
+        agents = []
+
+        for i in rows:
+            agent = Agent(
+                ID=self.ids[i],
+                wealth=float(self.wealth[i]),
+                income=float(self.income[i]),
+                experience_level=self.experience_level[i],
+                self_efficacy=self.self_efficacy[i],
+                house=self.house[i],
+                params=self.params[i],
+            )
+
+            agent.max_mortgage = float(self.max_mortgage[i])
+            agent.preferred_rating = int(self.preferred_rating[i])
+            agent.mortgage = float(self.mortgage[i]) if self.has_mortgage[i] else None
+            agent.satisfaction = int(self.satisfaction[i])
+            agent.protection = {
+                "rain_protection": int(self.rain_protection[i]),
+                "river_protection": int(self.river_protection[i]),
+            }
+            agent.adopted_measures = adopted[i - rows.start]
+            for measure, round_nr in agent.adopted_measures:
+                if measure.index is not None:
+                    agent.adopted_mask |= 1 << measure.index
+
+            damage_costs = self.params[i]["damage_costs"]
+            agent.damage_history = [
+                {"rain": int(rain[i]), "river": int(river[i]), "damage_cost": damage_costs * int(rain[i] + river[i])}
+                for rain, river in self.damage_rounds
+            ]
+            agent.satisfaction_history = [int(s[i]) for s in self.satisfaction_rounds]
+            agent.wealth_history = list(self.wealth_history[i]) + [float(w[i]) for w in self.wealth_rounds]
+
+            agents.append(agent)
+
+        return agents
+
+    def to_replicates(self):
+        """
+        Convert a batched population back to one agent list per replicate.
+
+        Yields the replicates one at a time and builds the agents of a
+        replicate only when it is requested, so a caller that drops each
+        list before asking for the next never holds more than one.
+        """
+
+        start = 0
+        for size in self.replicate_sizes:
+            yield self.to_agents(range(start, start + size))
+            start += size
@@ -0,0 +1,136 @@
+"""
+Content-addressed on-disk cache for simulation replicates.
+
+A replicate is identified by everything that determines its outcome: the
+scenario parameters, the seed (or RunStreams key), the agent parameters,
+the housing stock and the model code. ResultCache.key() hashes these parts
+together with code_version(): a hash of the model modules (MODEL_FILES),
+the housing input and the source of the runner functions that produce a
+replicate. Editing the model invalidates old entries automatically, while
+a tweak in the plotting or export code of a runner, in the runner helpers
+(statistics, stopping rule, OCBA, run catalogue) or in classes/visualise.py
+does not.
+
+Runners look up every replicate before running it and store each result
+as soon as it is computed, so an interrupted sweep resumes where it
+stopped. Entries are written atomically (temporary file + rename), which
+makes it safe for several worker processes or threads to share one cache
+directory.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import threading
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Files that define the model and its input. A new model module must be
+# added here; runner helpers and plotting code are left out on purpose.
+MODEL_FILES = (
+    "classes/hazard_generator.py",
+    "classes/homeowner_agent.py",
+    "classes/house_table.py",
+    "classes/housing_market.py",
+    "classes/initialisation.py",
+    "classes/measures.py",
+    "classes/pmt_tables.py",
+    "classes/population.py",
+    "classes/rng_streams.py",
+    "classes/scenario_initialisation.py",
+    "data/houses_dict.py",
+    "data/houses.xlsx",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def code_version(*extra):
+    """
+    Hash of the MODEL_FILES plus extra.
+
+    Args:
+        *extra: Paths of further files, or functions and classes whose
+            source affects the cached results (e.g. the simulation
+            functions of a runner and the code that builds the cached
+            result, without its plotting and export code).
+
+    Returns:
+        str: Hex digest.
+    """
+
+    digest = hashlib.sha256()
+    for path in (ROOT / p for p in MODEL_FILES):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    for item in extra:
+        if isinstance(item, (str, os.PathLike)):
+            path = Path(item).resolve()
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+        else:
+            digest.update(item.__qualname__.encode())
+            digest.update(inspect.getsource(item).encode())
+    return digest.hexdigest()
+
+
+def fingerprint(value):
+    """
+    Stable hash of a JSON-serialisable value (e.g. a houses_dict).
+    """
+
+    data = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """
+    Directory of pickled results, addressed by a hash of their inputs.
+    """
+
+    def __init__(self, directory="cache"):
+        self.directory = Path(directory)
+
+    def key(self, **parts):
+        """
+        Cache key for a replicate described by keyword parts.
+
+        The parts must be JSON-serialisable; dict order does not matter.
+        """
+
+        return fingerprint(parts)
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    def get(self, key, default=None):
+        """
+        Cached result for key, or default if there is none.
+        """
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return default
+
+    def put(self, key, value):
+        """
+        Store a result under key (atomic, last writer wins).
+        """
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
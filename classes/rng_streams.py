@@ -0,0 +1,67 @@
+"""
+Independent random streams per simulation run.
+
+Without streams a run seeds one generator with one integer seed (e.g.
+base_seed + scenario_id * 10_000 + rep), which collides as soon as
+rep >= 10_000, and every part of the run draws from the same sequence.
+Both runners use RunStreams in their __main__ (rng_streams=True).
+
+RunStreams derives the randomness of one run from a
+numpy.random.SeedSequence keyed on (base_seed, *key), e.g. (scenario_id,
+rep). Different keys give independent streams without collisions. The
+run's SeedSequence spawns one child stream per component:
+
+    population  initialisation of the agents
+    market      generation of the housing stock
+    floods      flood draws per round
+
+The decision rules are deterministic, so they have no stream. A stream
+added later at the end of STREAM_NAMES leaves the existing ones unchanged.
+
+Each stream is a random.Random, so it can be passed as rng= to the
+initialisation functions, generate_house_table_from_agents and floods.
+Because a component only draws from its own stream, changing the number
+of draws in one component does not shift the others.
+"""
+
+import random
+
+import numpy as np
+
+
+STREAM_NAMES = ("population", "market", "floods")
+
+
+def _python_seed(seed_sequence):
+    """
+    128-bit integer seed for random.Random from a SeedSequence.
+    """
+
+    words = seed_sequence.generate_state(4, dtype=np.uint32)
+    return int.from_bytes(words.astype("<u4").tobytes(), "little")
+
+
+class RunStreams:
+    """
+    Random streams of one run, spawned from a SeedSequence.
+    """
+
+    def __init__(self, base_seed, *key):
+        """
+        Args:
+            base_seed (int): Seed of the whole experiment.
+            *key (int): Identifies the run, e.g. scenario_id, rep.
+        """
+
+        self.key = tuple(int(k) for k in key)
+        self.seed_sequence = np.random.SeedSequence(base_seed, spawn_key=self.key)
+
+        children = self.seed_sequence.spawn(len(STREAM_NAMES))
+        self.seeds = {name: _python_seed(child) for name, child in zip(STREAM_NAMES, children)}
+
+        self.population = random.Random(self.seeds["population"])
+        self.market = random.Random(self.seeds["market"])
+        self.floods = random.Random(self.seeds["floods"])
+
+    def __repr__(self):
+        return f"RunStreams(entropy={self.seed_sequence.entropy}, key={self.key})"
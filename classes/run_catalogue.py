@@ -0,0 +1,176 @@
+"""
+SQLite catalogue of simulation runs.
+
+Every finished run adds one row to the runs table: the runner, the
+scenario fields, seed, number of agents and rounds, runtime, output path
+and summary metrics. Analysis scripts can query the catalogue with SQL
+instead of listing the results directory, parsing filenames or opening
+every run file or the Excel workbook:
+
+    catalogue = RunCatalogue("results/runs.sqlite")
+    catalogue.query("SELECT scenario_id, AVG(final_mean_satisfaction) FROM runs GROUP BY scenario_id")
+
+A run is identified by (runner, scenario_id, seed, rep, n_agents,
+rounds); recording it again replaces the row. Runs taken from a
+ResultCache are recorded with cached = 1 and no runtime_s, so the
+runtimes only count simulations that actually ran. rep is the replicate index
+of run_scenarios (its runs with RunStreams have no seed), experiment runs
+are identified by their seed. Each record opens its own short
+connection, so worker processes and threads can write to the same file.
+"""
+
+import sqlite3
+from pathlib import Path
+
+
+COLUMNS = {
+    "runner": "TEXT NOT NULL",
+    "scenario_id": "TEXT NOT NULL",
+    "flood_regime": "TEXT",
+    "policy_type": "TEXT",
+    "measure": "TEXT",
+    "subsidy_level": "REAL",
+    "insurance": "INTEGER",
+    "wealth": "TEXT",
+    "experience": "TEXT",
+    "seed": "INTEGER",
+    "rep": "INTEGER",
+    "n_agents": "INTEGER",
+    "rounds": "INTEGER",
+    "runtime_s": "REAL",
+    "cached": "INTEGER NOT NULL DEFAULT 0",
+    "path": "TEXT",
+    "final_mean_satisfaction": "REAL",
+    "mean_total_purchases_per_agent": "REAL",
+    "mean_unique_measures_per_agent": "REAL",
+}
+
+# Value of a column that a run does not give (NULL otherwise)
+DEFAULTS = {"cached": 0}
+
+# Averages per scenario in scenario_summary, named as in the ScenarioSummary sheet
+SUMMARY_METRICS = {
+    "avg_unique_measures_per_agent": "mean_unique_measures_per_agent",
+    "avg_total_purchases_per_agent": "mean_total_purchases_per_agent",
+    "avg_satisfaction": "final_mean_satisfaction",
+}
+
+
+class RunCatalogue:
+    """
+    Runs table in a SQLite database file.
+    """
+
+    def __init__(self, path="results/runs.sqlite", timeout=60.0):
+        """
+        Args:
+            path (str): Database file; created with its directory if needed.
+            timeout (float): Seconds to wait for a lock held by another writer.
+        """
+
+        self.path = Path(path)
+        self.timeout = timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        columns = ",\n".join(f"{name} {kind}" for name, kind in COLUMNS.items())
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(f"""
+                    CREATE TABLE IF NOT EXISTS runs (
+                        id INTEGER PRIMARY KEY,
+                        {columns},
+                        recorded_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                # Catalogues of an older version miss the newer columns
+                existing = {row["name"] for row in connection.execute("PRAGMA table_info(runs)")}
+                for name, kind in COLUMNS.items():
+                    if name not in existing:
+                        connection.execute(f"ALTER TABLE runs ADD COLUMN {name} {kind}")
+                # IFNULL: a missing seed or rep still identifies the run
+                connection.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS runs_identity ON runs (
+                        runner, scenario_id, IFNULL(seed, -1), IFNULL(rep, -1), n_agents, rounds
+                    )
+                """)
+        finally:
+            connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def record(self, *runs):
+        """
+        Add or replace runs, given as dictionaries with keys from COLUMNS.
+        """
+
+        if not runs:
+            return
+
+        names = list(COLUMNS)
+        for run in runs:
+            unknown = set(run) - set(names)
+            if unknown:
+                raise KeyError(f"Unknown catalogue columns: {sorted(unknown)}")
+
+        rows = [[_sql_value(run.get(name, DEFAULTS.get(name))) for name in names] for run in runs]
+        sql = f"INSERT OR REPLACE INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(sql, rows)
+        finally:
+            connection.close()
+
+    def query(self, sql, params=()):
+        """
+        Run a SELECT and return the rows as dictionaries.
+        """
+
+        connection = self._connect()
+        try:
+            return [dict(row) for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
+
+    def scenario_summary(self, runner=None):
+        """
+        Mean of the SUMMARY_METRICS and number of runs per scenario, with
+        the column names of the ScenarioSummary sheet of run_scenarios.
+
+        Args:
+            runner (str, optional): Only runs of this runner.
+        """
+
+        averages = ", ".join(f"AVG({column}) AS {name}" for name, column in SUMMARY_METRICS.items())
+        where = "WHERE runner = ?" if runner is not None else ""
+        params = (runner,) if runner is not None else ()
+
+        return self.query(
+            f"""
+            SELECT runner, scenario_id, flood_regime, policy_type, wealth, experience, n_agents, rounds,
+                   COUNT(*) AS reps, {averages}
+            FROM runs {where}
+            GROUP BY runner, scenario_id, flood_regime, policy_type, wealth, experience, n_agents, rounds
+            ORDER BY runner, CAST(scenario_id AS INTEGER), scenario_id
+            """,
+            params,
+        )
+
+
+def _sql_value(value):
+    """
+    Convert NumPy scalars and paths to values sqlite3 can store.
+    """
+
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, Path):
+        return str(value)
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
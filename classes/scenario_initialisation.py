@@ -8,7 +8,7 @@
 
 import random
 from classes.initialisation import initialise_agents
-from classes.homeowner_agent import Agent
+from classes.homeowner_agent import Agent, shared_params
 
 # Wealth op basis van 8 vaste profielen, dus als een scenario met arm wordt gekozen is elke agent of p1 of p3
 PROFILES_BY_WEALTH = {
@@ -30,13 +30,21 @@ def initialise_scenario_population(
         n=100,
         seed=42,
         wealth_class="Gemiddeld",
-        experience_level="Nooit"
+        experience_level="Nooit",
+        rng=None
 ):
     """
     Creeert specifiek scenario.
+
+    rng (random.Random) is een eigen generator (bijv. per thread) in plaats
+    van de globale random module; hij wordt met seed geseed. Met seed=None
+    wordt de huidige toestand van rng gebruikt (bijv. een RunStreams-stroom).
     """
 
-    random.seed(seed)
+    if rng is None:
+        rng = random
+    if seed is not None:
+        rng.seed(seed)
 
     base_agents = initialise_agents()  #vaste 8 profielen uit de initialise class
 
@@ -47,19 +55,22 @@ def initialise_scenario_population(
 
     agents = []
 
+    # experience is een scenario-instelling en niet afkomstig uit eerdere runs; n dict voor de hele populatie
+    params = shared_params({"experience_source": "scenario"})
+
     for i in range(n):
-        chosen_id = random.choice(allowed_ids) #random keuze uit player profiles die voldoen aan rijk, arm, gemiddeld
+        chosen_id = rng.choice(allowed_ids) #random keuze uit player profiles die voldoen aan rijk, arm, gemiddeld
         template = base_dict[chosen_id] # maak een lijst met alle profielen die van toepassing zijn
 
         # Maak nieuwe agent met dezelfde eigenschappen
         agent = Agent(
-            ID=f"a{i+1}",
+            ID=i + 1,
             wealth=template.wealth,
             income=template.income,
             experience_level=experience_level, #dus dit kan nog aangepast worden bij runnen van de scenario's
             self_efficacy=template.self_efficacy, #neem die van het originale player profile
             house=None,
-            params={"experience_source": "scenario"}  # experience is een scenario-instelling en niet afkomstig uit eerdere runs
+            params=params
         )
 
         agent.max_mortgage = template.max_mortgage
@@ -0,0 +1,83 @@
+"""
+Sequential stopping rule for replicates.
+
+Instead of running a fixed number of replicates, a runner can run them in
+batches and stop once the confidence interval of the mean output is narrow
+enough: the half-width t * s / sqrt(n) must be at most rel_precision times
+|mean|. Scenarios with little variation between replicates (e.g. N=1000)
+then stop after far fewer replicates than noisy ones (N=10).
+
+The values can be given as a list or as a RunningStats accumulator
+(classes/online_stats.py), so a runner does not need to keep them.
+
+The t quantile uses the Cornish-Fisher expansion around the normal
+quantile (Abramowitz & Stegun 26.7.5), so no SciPy is needed. It is
+accurate to about 1e-3 for 5 or more degrees of freedom; for fewer
+replicates the interval is only a rough guide, so use a minimum batch of
+at least 5 replicates.
+"""
+
+from math import sqrt
+from statistics import NormalDist, mean, stdev
+
+from classes.online_stats import RunningStats
+
+
+def t_quantile(p, df):
+    """
+    Quantile p of the Student t distribution with df degrees of freedom.
+    """
+
+    z = NormalDist().inv_cdf(p)
+    g1 = (z**3 + z) / 4
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160
+    return z + g1 / df + g2 / df**2 + g3 / df**3 + g4 / df**4
+
+
+def _summary(values):
+    """
+    (n, mean, stdev) of a list of values or a RunningStats.
+    """
+
+    if isinstance(values, RunningStats):
+        return values.n, values.mean, values.stdev
+    n = len(values)
+    return n, mean(values) if n else 0.0, stdev(values) if n > 1 else 0.0
+
+
+def ci_half_width(values, confidence=0.95):
+    """
+    Half-width of the t confidence interval of the mean of values.
+
+    Returns inf for fewer than two values.
+    """
+
+    n, _, sd = _summary(values)
+    if n < 2:
+        return float("inf")
+    return t_quantile(0.5 + confidence / 2, n - 1) * sd / sqrt(n)
+
+
+def precision_reached(values, rel_precision, confidence=0.95):
+    """
+    True if the CI half-width is at most rel_precision * |mean|.
+    """
+
+    n, m, _ = _summary(values)
+    if n < 2:
+        return False
+    return ci_half_width(values, confidence) <= rel_precision * abs(m)
+
+
+def reps_needed(values, rel_precision, batch_size=10, confidence=0.95):
+    """
+    Number of replicates after which a batched sequential run of values
+    would have stopped, or None if the precision is never reached.
+    """
+
+    for n in range(batch_size, len(values) + 1, batch_size):
+        if precision_reached(values[:n], rel_precision, confidence):
+            return n
+    return None
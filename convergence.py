@@ -8,9 +8,11 @@
 # ------------------------------------------------------------
 
 from model import run_single_simulation # Hier wordt namelijk gemiddelde satisfaction bepaald
+from classes.stopping_rule import reps_needed
 import matplotlib.pyplot as plt
 
 N_RUNS = 200
+TARGET_REL_CI = 0.02  # stopregel: halve breedte 95%-interval <= 2% van het gemiddelde
 
 results = []
 running_mean = []
@@ -20,8 +22,15 @@ for i in range(1, N_RUNS + 1):
     results.append(out)
     running_mean.append(sum(results) / len(results))
 
+# Na hoeveel runs de stopregel (in batches van 10) was gestopt
+n_needed = reps_needed(results, TARGET_REL_CI)
+print(f"Stopregel ({TARGET_REL_CI:.0%}): {n_needed if n_needed else f'niet gehaald binnen {N_RUNS}'} runs")
+
 plt.figure()
 plt.plot(range(1, N_RUNS + 1), running_mean)
+if n_needed:
+    plt.axvline(n_needed, linestyle="--", color="grey", label=f"Stopregel ({TARGET_REL_CI:.0%} CI): {n_needed} runs")
+    plt.legend()
 plt.xlabel("Number of model runs")
 plt.ylabel("Running mean of final satisfaction")
 plt.title("Convergence of model output")
@@ -11,7 +11,10 @@ relationships.
 import pandas as pd 
 import ast
 import random
-import copy
+
+import numpy as np
+
+from classes.house_table import HouseTable
 
 # Read Excel file with houses
 df = pd.read_excel("data/houses.xlsx")  
@@ -51,14 +54,15 @@ houses_dict = {
     for _, row in df.iterrows()
 }
 
-def generate_houses_from_agents(
+def generate_house_table_from_agents(
     base_houses_dict,
     agents,
     target_n_houses=1200,
     seed=42,
     affordability_quantile=0.95,   
     house_price_quantile=0.20,     
-    jitter=0.10                    
+    jitter=0.10,
+    rng=None
 ):
     """
     Generate a synthetic housing stock scaled to agent affordability.
@@ -67,10 +71,15 @@ def generate_houses_from_agents(
     prices match the upper affordability of the agent population.
     Random variation is added to prices and protection levels.
 
-    Returns a dictionary of newly generated houses.
+    Draws come from random.Random(seed), or from rng if given (e.g. the
+    market stream of RunStreams).
+
+    Returns a HouseTable with integer house IDs; the string IDs
+    ("<base id>_g<i>") are kept as export labels.
     """
 
-    rng = random.Random(seed)
+    if rng is None:
+        rng = random.Random(seed)
 
     base_items = list(base_houses_dict.items())
     if not base_items:
@@ -92,25 +101,74 @@ def generate_houses_from_agents(
     # Scale factor to align housing prices with agent affordability
     scale = (b_q / p_q) if p_q > 0 else 1.0
 
-    houses = {}
-    for i in range(target_n_houses):
-        hid, info = rng.choice(base_items)
-        new_id = f"{hid}_g{i}"
+    base = [
+        (hid, float(info["value"]), info.get("rain_protection"), info.get("river_protection"))
+        for hid, info in base_items
+    ]
+    base_index = range(len(base))
 
-        new_info = copy.deepcopy(info)
-        new_info["available"] = True
+    template = np.empty(target_n_houses, dtype=np.int32)
+    value = np.empty(target_n_houses, dtype=np.float64)
+    rain = np.zeros(target_n_houses, dtype=np.int64)
+    river = np.zeros(target_n_houses, dtype=np.int64)
+    labels = []
+
+    for i in range(target_n_houses):
+        # Same draws as picking from base_items directly
+        b = rng.choice(base_index)
+        hid, v, rain_prot, river_prot = base[b]
+        template[i] = b
+        labels.append(f"{hid}_g{i}")
 
         # Scale and jitter house price
-        v = float(new_info["value"])
         v = v * scale * rng.uniform(1 - jitter, 1 + jitter)
-        new_info["value"] = max(0.0, v)
+        value[i] = max(0.0, v)
 
         # Optional small variation in protection levels
-        if "rain_protection" in new_info:
-            new_info["rain_protection"] = max(0, int(round(new_info["rain_protection"] + rng.choice([-1,0,1]))))
-        if "river_protection" in new_info:
-            new_info["river_protection"] = max(0, int(round(new_info["river_protection"] + rng.choice([-1,0,1]))))
+        if rain_prot is not None:
+            rain[i] = max(0, int(round(rain_prot + rng.choice([-1,0,1]))))
+        if river_prot is not None:
+            river[i] = max(0, int(round(river_prot + rng.choice([-1,0,1]))))
+
+    # Fields that are copied unchanged from the base house
+    base_infos = [info for _, info in base_items]
+    base_round = np.array([info.get("available_round", 1) for info in base_infos], dtype=np.int64)
+    base_rating = np.array([info["preferred_rating"] for info in base_infos], dtype=np.int64)
+
+    return HouseTable(
+        value=value,
+        available_round=base_round[template],
+        rain_protection=rain,
+        river_protection=river,
+        preferred_rating=base_rating[template],
+        labels=labels,
+        template=template,
+        measure_sets=[list(info.get("active_measures", [])) for info in base_infos],
+    )
+
+
+def generate_houses_from_agents(
+    base_houses_dict,
+    agents,
+    target_n_houses=1200,
+    seed=42,
+    affordability_quantile=0.95,   
+    house_price_quantile=0.20,     
+    jitter=0.10                    
+):
+    """
+    Generate a synthetic housing stock scaled to agent affordability.
 
-        houses[new_id] = new_info
+    Same houses and draws as generate_house_table_from_agents, returned as a
+    dictionary of newly generated houses keyed by string ID.
+    """
 
-    return houses
\ No newline at end of file
+    return generate_house_table_from_agents(
+        base_houses_dict,
+        agents,
+        target_n_houses=target_n_houses,
+        seed=seed,
+        affordability_quantile=affordability_quantile,
+        house_price_quantile=house_price_quantile,
+        jitter=jitter,
+    ).to_dict()
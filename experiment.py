@@ -5,32 +5,55 @@ This script:
 1) Defines the policy scenarios (baseline, subsidy, insurance) under two flood regimes
    (one-shock vs. random floods).
 2) Runs multiple Monte Carlo simulations per scenario (different random seeds) and exports
-   per-agent histories to CSV files in /results.
+   per-agent histories to a Parquet store in /results/history (or, without pyarrow, to CSV
+   files in /results).
 3) Loads exported results and reproduces the thesis figures (satisfaction trajectories with
    uncertainty bands and measure adoption comparisons), saving plots to /plots.
 """
 
-import copy
 import random
 import os
 import glob
+import time
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from typing import Dict, Optional, List
 
-from classes.measures import measures
+from classes.measures import catalogue
 from classes.hazard_generator import floods
 from classes.initialisation import initialise_agents_n, initialise_agents
-from export import save_history, initialise_history, update_history, add_round_zero
+from classes.homeowner_agent import shared_params
+from classes.house_table import HouseTable
+from classes.housing_market import HousingMarket
+from classes.result_cache import ResultCache, code_version, fingerprint
+from classes.run_catalogue import RunCatalogue
+from classes.rng_streams import RunStreams
+from classes.online_stats import ReplicateSummary, SketchCollector
+from classes.stopping_rule import precision_reached
+from export import (save_history, save_history_parquet, load_history, load_purchases, purchases_path, HistoryRecorder,
+                    history_summary, HISTORY_CODE, HISTORY_STORE, PURCHASE_STORE, PARQUET_AVAILABLE, RUN_KEYS,
+                    measure_holdings, measure_columns, satisfaction_sketches, save_sketches, load_sketches)
+from adoption import measure_matrix, ever_adopted_shares, final_adoption_shares
 
 from data.houses_dict import houses_dict
 
 RESULTS_DIR = "results"
+RESULTS_FORMAT = "parquet" if PARQUET_AVAILABLE else "csv"
+RESULTS_FORMATS = ("parquet", "csv", "sketch")
+
+# Satisfaction counts per run and round of a results_format="sketch" sweep,
+# and the satisfaction bands (quantiles) computed from them
+SATISFACTION_COUNTS = "satisfaction_counts.csv"
+SATISFACTION_BANDS = {"sat_p10": 0.10, "sat_p50": 0.50, "sat_p90": 0.90}
 OUT_DIR = "plots"
 
+# Outcomes per run whose precision decides when a scenario has enough runs (target_rel_ci)
+CI_METRICS = ("final_mean_satisfaction", "mean_total_purchases_per_agent")
+
 
 @dataclass(frozen=True)
 class Scenario:
@@ -53,37 +76,173 @@ SCENARIOS: List[Scenario] = [
     Scenario("random_floods", "R3", "Insurance", None,         None, True),
 ]
 
-def set_seeds(seed: int) -> None:
-    random.seed(seed)
-    np.random.seed(seed)
+def run_seed(s: Scenario, run_index: int, base_seed: int = 42) -> int:
+    """
+    Random seed of one run.
+
+    Common random numbers by design: the seed depends on base_seed and the
+    run index only, not on the scenario s. Run i of every scenario starts
+    from the same population and the same flood draws, so the difference
+    between two scenarios in run i comes from the policy and flood regime
+    and not from sampling noise, which narrows the paired comparisons of
+    the analysis. s is part of the signature so a per-scenario seed can be
+    introduced here without changing the callers. The seed does not depend
+    on the order in which runs are executed.
+    """
+
+    return base_seed + run_index
+
+
+def run_cache_key(cache: ResultCache, s: Scenario, seed: int, houses_key: str, stream_key=None) -> str:
+    """
+    Cache key of one run: scenario settings, seed (or RunStreams key), housing stock
+    (houses_key, a fingerprint of the houses_dict), agent parameters and
+    the version of the model code and of the functions that simulate and
+    record a run (export.HISTORY_CODE; not the plotting and export code of
+    this module).
+    """
+
+    return cache.key(
+        runner="experiment",
+        scenario=asdict(s),
+        seed=seed,
+        stream_key=stream_key,
+        houses=houses_key,
+        params=shared_params(),
+        code=code_version(_simulate_run, floods_for_round, make_policy_measures, *HISTORY_CODE),
+    )
 
-def run_once(s: Scenario, seed: int, houses_dict: Dict) -> None:
+
+def run_once(
+    s: Scenario,
+    seed: int,
+    houses_dict: Dict,
+    verbose: bool = True,
+    cache_dir: Optional[str] = None,
+    results_format: str = RESULTS_FORMAT,
+    catalogue_path: Optional[str] = None,
+    stream_key: Optional[tuple] = None,
+    results_dir: str = RESULTS_DIR,
+    houses_key: Optional[str] = None,
+):
     """
     Run a single simulation for one scenario and random seed.
 
     Initializes agents and measures, simulates all rounds,
     and exports agent-level history to a CSV file.
+
+    Every run buys from its own availability overlay of houses_dict (a
+    dict or a shared HouseTable), so runs do not depend on each other.
+    Random draws come from a private generator seeded with seed, so runs
+    can also execute side by side in threads. With stream_key, e.g.
+    (base_seed, run_index), the population and the floods draw from their
+    own RunStreams streams instead; seed then only labels the run.
+
+    With cache_dir the agent history is stored in a ResultCache. A run that
+    is already cached is not simulated again; its CSV is written from the
+    cached history, so an interrupted experiment resumes where it stopped.
+    houses_key is the fingerprint of the housing stock in the cache key;
+    a sweep computes it once, otherwise every run hashes the stock again.
+
+    results_format="parquet" writes the history to the Parquet store
+    (export.save_history_parquet), "csv" to CSV files, both in
+    results_dir. With
+    catalogue_path the run is also recorded in that RunCatalogue.
+    results_format="sketch" writes and records nothing and returns the satisfaction
+    distribution of every round as a SketchCollector with keys
+    RUN_KEYS + round, for sweeps that only need the satisfaction bands.
+
+    Returns:
+        Path: The saved file (SketchCollector for results_format="sketch").
     """
 
-    set_seeds(seed)
+    history, runtime, cached = _simulate_run(s, seed, houses_dict, cache_dir, stream_key, houses_key)
+    return _save_run(history, s, seed, verbose, results_format, catalogue_path, runtime, results_dir, cached=cached)
 
-    history = initialise_history()
+
+def _simulate_run(
+    s: Scenario,
+    seed: int,
+    houses_dict: Dict,
+    cache_dir: Optional[str] = None,
+    stream_key: Optional[tuple] = None,
+    houses_key: Optional[str] = None,
+):
+    """
+    Simulate one run (see run_once), or take it from the ResultCache.
+
+    Returns:
+        tuple: (HistoryRecorder, runtime in seconds, True if cached)
+    """
+
+    base = houses_dict if isinstance(houses_dict, HouseTable) else HouseTable.from_dict(houses_dict)
+
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    if cache is not None:
+        if houses_key is None:
+            houses_key = fingerprint(base.to_dict())
+        key = run_cache_key(cache, s, seed, houses_key, stream_key)
+        cached = cache.get(key)
+        if cached is not None:
+            history, runtime = cached
+            return history, runtime, True
+
+    start = time.perf_counter()
+    if stream_key is not None:
+        streams = RunStreams(*stream_key)
+        population_rng, flood_rng, population_seed = streams.population, streams.floods, None
+    else:
+        population_rng = flood_rng = random.Random(seed)
+        population_seed = seed
 
     try:
-        agents = initialise_agents_n(n=s.agents, seed=seed)
+        agents = initialise_agents_n(n=s.agents, seed=population_seed, rng=population_rng)
     except Exception:
         agents = initialise_agents()
 
     policy_measures = make_policy_measures(s)
-    add_round_zero(history, agents)
+    market = HousingMarket(base.overlay())
+
+    history = HistoryRecorder(agents, s.rounds)
+    history.record(0)
 
     for round_nr in range(1, s.rounds + 1):
-        flood_results = floods_for_round(s, round_nr)
+        flood_results = floods_for_round(s, round_nr, flood_rng)
         for agent in agents:
-            agent.step(houses_dict, policy_measures, flood_results, current_round=round_nr)
-            update_history(history, agent, flood_results, round_nr)
+            agent.step(market, policy_measures, flood_results, current_round=round_nr)
+        history.record(round_nr, flood_results)
+
+    history.finish()
+    runtime = time.perf_counter() - start
+    if cache is not None:
+        cache.put(key, (history, runtime))
+
+    return history, runtime, False
+
+
+def _save_run(
+    history,
+    s: Scenario,
+    seed: int,
+    verbose: bool = True,
+    results_format: str = RESULTS_FORMAT,
+    catalogue_path: Optional[str] = None,
+    runtime: Optional[float] = None,
+    results_dir: str = RESULTS_DIR,
+    cached: bool = False,
+):
+    """
+    Export the history of one run with its scenario settings to results_dir.
+    cached=True marks a history from the ResultCache in the RunCatalogue.
+    """
 
-    save_history(
+    if results_format not in RESULTS_FORMATS:
+        raise ValueError(f"Unknown results_format: {results_format}")
+    if results_format == "sketch":
+        return satisfaction_sketches(history, key=(s.scenario_id, s.flood_regime, s.policy_type, seed))
+    save = save_history_parquet if results_format == "parquet" else save_history
+
+    return save(
         history,
         scenario_id=s.scenario_id,
         flood_regime=s.flood_regime,
@@ -93,9 +252,14 @@ def run_once(s: Scenario, seed: int, houses_dict: Dict) -> None:
         insurance=s.insurance_available,
         n_agents=s.agents,
         seed=seed,
+        verbose=verbose,
+        catalogue=RunCatalogue(catalogue_path) if catalogue_path is not None else None,
+        runtime=runtime,
+        results_dir=results_dir,
+        cached=cached,
     )
 
-def floods_for_round(s: Scenario, round_nr: int):
+def floods_for_round(s: Scenario, round_nr: int, rng: Optional[random.Random] = None):
     """
     Return flood damage for a given round based on the scenario flood regime.
 
@@ -107,54 +271,194 @@ def floods_for_round(s: Scenario, round_nr: int):
         return {"rain_damage": 10, "river_damage": 12} if round_nr == 2 else {"rain_damage": 0, "river_damage": 0}
 
     if s.flood_regime == "random_floods":
-        return floods()
+        return floods(rng=rng)
 
     raise ValueError(f"Unknown flood_regime: {s.flood_regime}")
 
 
-def _find_measure(measures_list, name: str):
-    """
-    Return the first measure with a matching name.
-    Raises ValueError if the measure is not found.
-    """
-
-    for m in measures_list:
-        if getattr(m, "name", None) == name:
-            return m
-    raise ValueError(f"Measure with name='{name}' not found.")
-
-
 def make_policy_measures(s: Scenario):
     """
-    Create a scenario-specific copy of the measures list.
+    Create the scenario-specific variant of the measure catalogue.
 
     Applies policy settings such as subsidy levels and insurance availability.
+    Only the changed measures are copied, and the variant is cached by the
+    catalogue, so runs of the same scenario share it.
     """
-    
-    policy_measures = copy.deepcopy(measures)
 
-    insurance = _find_measure(policy_measures, "Flood insurance")
+    changes = {}
+
+    insurance = catalogue.find("Flood insurance")
 
     if hasattr(insurance, "available"):
-        insurance.available = bool(s.insurance_available)
+        changes["Flood insurance"] = {"available": bool(s.insurance_available)}
     else:
         if not s.insurance_available:
-            insurance.cost = float("inf")
+            changes["Flood insurance"] = {"cost": float("inf")}
 
     if s.policy_type == "Subsidy" and s.subsidised_measures:
-        m = _find_measure(policy_measures, s.subsidised_measures)
-        m.subsidy_percentage = float(s.subsidy_level or 0.0)
+        changes.setdefault(s.subsidised_measures, {})["subsidy_percentage"] = float(s.subsidy_level or 0.0)
+
+    return catalogue.variant(changes)
 
-    return policy_measures
+# Base stock of a process-pool worker, set once by _init_worker
+_worker_houses = None
 
-def run_all_experiments(houses_dict: Dict, base_seed: int = 42) -> None:
-    for s in SCENARIOS:
-        for i in range(s.runs):
-            seed = base_seed + i
-            run_once(s, seed=seed, houses_dict=houses_dict)
-            print(f"{s.scenario_id} run {i+1}/{s.runs} done (seed={seed})")
 
-    print("\nFinished. Results can be found in: results/")
+def _init_worker(houses):
+    """
+    Process-pool initializer: keep the read-only base stock in the worker,
+    so it is pickled once per worker instead of with every job.
+    """
+
+    global _worker_houses
+    _worker_houses = houses
+
+
+def _run_job(job):
+    """
+    Run one (scenario, run) job; top-level so it can run in a process pool.
+    A job without houses_dict uses the stock of _init_worker.
+
+    Returns:
+        tuple: (result of run_once, CI_METRICS of the run)
+    """
+
+    s, seed, houses_dict, houses_key, cache_dir, results_format, catalogue_path, stream_key, results_dir = job
+    if houses_dict is None:
+        houses_dict = _worker_houses
+
+    history, runtime, cached = _simulate_run(s, seed, houses_dict, cache_dir, stream_key, houses_key)
+    result = _save_run(history, s, seed, False, results_format, catalogue_path, runtime, results_dir, cached=cached)
+
+    summary = history_summary(history)
+    return result, {metric: summary[metric] for metric in CI_METRICS}
+
+
+def run_all_experiments(
+    houses_dict: Dict,
+    base_seed: int = 42,
+    workers: Optional[int] = None,
+    executor: str = "process",
+    cache_dir: Optional[str] = None,
+    results_format: str = RESULTS_FORMAT,
+    catalogue_path: Optional[str] = None,
+    rng_streams: bool = False,
+    results_dir: str = RESULTS_DIR,
+    target_rel_ci: Optional[float] = None,
+    batch_size: int = 10,
+    confidence: float = 0.95,
+) -> None:
+    """
+    Run all scenarios and export the history of every run (see run_once).
+
+    With workers > 1 the runs are spread over a process pool, or a thread
+    pool with executor="thread". Threads share one read-only HouseTable and
+    the measure catalogue, which pays off on free-threaded Python builds;
+    a worker process receives the HouseTable once, through the pool
+    initializer. benchmark_parallel.py compares the modes.
+    Runs are independent and seeded by run_seed(), and progress is printed
+    by the main process in job order, so output files and log are the same
+    as in a serial run.
+
+    With cache_dir, runs that are already in the ResultCache are not
+    simulated again (see run_once). With catalogue_path every run is
+    recorded in that RunCatalogue (SQLite).
+
+    rng_streams=True gives run i of every scenario the RunStreams
+    (base_seed, i): independent population and flood streams, still common
+    to all scenarios (different draws than the plain seeds).
+
+    target_rel_ci (e.g. 0.02) makes s.runs a maximum: runs are done in
+    batches of batch_size and a scenario stops once the confidence interval
+    (confidence) of every CI_METRICS outcome has a half-width of at most
+    target_rel_ci * |mean| (classes/stopping_rule.py). Run i always has the
+    same seed, so the runs that are done do not depend on workers.
+
+    With results_format="sketch" no agent-level rows are written: the
+    satisfaction sketches of all runs are merged as they come in and saved
+    to results_dir/satisfaction_counts.csv, from which load_all_satisfaction
+    computes the satisfaction bands. Any other format removes that file
+    first, so the bands are computed from the new runs.
+    """
+
+    if executor not in ("process", "thread"):
+        raise ValueError(f"Unknown executor: {executor}")
+
+    # Read-only base stock; every run buys from its own overlay
+    base = HouseTable.from_dict(houses_dict)
+    houses_key = fingerprint(base.to_dict()) if cache_dir is not None else None
+
+    # Counts of an earlier sketch sweep would take precedence over the new runs
+    counts_path = os.path.join(results_dir, SATISFACTION_COUNTS)
+    if results_format != "sketch" and os.path.exists(counts_path):
+        os.remove(counts_path)
+        print(f"Removed: {counts_path}")
+
+    # Without a precision target 1 wave with all runs, otherwise waves of batch_size
+    if target_rel_ci is not None and batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    summaries = [ReplicateSummary(CI_METRICS) for s in SCENARIOS]
+
+    def scenario_done(s: Scenario, summary: ReplicateSummary) -> bool:
+        if len(summary) >= s.runs:
+            return True
+        if target_rel_ci is None:
+            return False
+        return all(precision_reached(summary[metric], target_rel_ci, confidence) for metric in CI_METRICS)
+
+    def next_wave() -> list:
+        """(scenario index, scenario, run index, seed) of the next runs."""
+        wave = []
+        for k, (s, summary) in enumerate(zip(SCENARIOS, summaries)):
+            if scenario_done(s, summary):
+                continue
+            done = len(summary)
+            size = s.runs - done if target_rel_ci is None else min(batch_size, s.runs - done)
+            wave.extend((k, s, i, run_seed(s, i, base_seed)) for i in range(done, done + size))
+        return wave
+
+    pool = None
+    shared = base
+    if workers is not None and workers > 1:
+        if executor == "thread":
+            pool = ThreadPoolExecutor(max_workers=workers)
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(base,))
+            shared = None
+
+    try:
+        sketches = SketchCollector()
+        jobs = next_wave()
+        while jobs:
+            tasks = [
+                (s, seed, shared, houses_key, cache_dir, results_format, catalogue_path,
+                 (base_seed, i) if rng_streams else None, results_dir)
+                for k, s, i, seed in jobs
+            ]
+            results = pool.map(_run_job, tasks) if pool is not None else map(_run_job, tasks)
+
+            for (k, s, i, seed), (result, metrics) in zip(jobs, results):
+                summaries[k].add(metrics)
+                if results_format == "sketch":
+                    sketches.merge(result)
+                else:
+                    print(f"Saved: {result}")
+                print(f"{s.scenario_id} run {i+1}/{s.runs} done (seed={seed})")
+
+            jobs = next_wave()
+
+        if target_rel_ci is not None:
+            for s, summary in zip(SCENARIOS, summaries):
+                print(f"{s.scenario_id}: {len(summary)}/{s.runs} runs")
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    if results_format == "sketch":
+        path = save_sketches(sketches, counts_path, [*RUN_KEYS, "round"])
+        print(f"Saved: {path}")
+
+    print(f"\nFinished. Results can be found in: {results_dir}/")
 
 
 def parse_filename(fp: str) -> dict:
@@ -184,6 +488,68 @@ def parse_filename(fp: str) -> dict:
     }
 
 
+def load_runs(results_dir: str = RESULTS_DIR, scenario_ids=None, rounds=None, columns=None) -> pd.DataFrame:
+    """
+    Load the agent histories of all runs as one dataframe with RUN_KEYS columns.
+
+    Reads the Parquet store (results_dir/history) when it exists, with the
+    scenario and round filters pushed down to the files; otherwise the
+    history_*.csv files, with the run metadata parsed from their filenames.
+
+    The rows hold the agent state; the measures are in the purchase events
+    (load_run_purchases).
+    """
+
+    if os.path.isdir(os.path.join(results_dir, HISTORY_STORE)):
+        return load_history(results_dir, scenario_ids=scenario_ids, rounds=rounds, columns=columns)
+
+    return _load_csv_runs(results_dir, scenario_ids, rounds, columns)
+
+
+def load_run_purchases(results_dir: str = RESULTS_DIR, scenario_ids=None, columns=None) -> pd.DataFrame:
+    """
+    Load the purchase events of all runs as one dataframe with RUN_KEYS
+    columns, from the Parquet store (results_dir/purchases) or the
+    purchases_*.csv files next to the history CSVs, filtered on scenario as
+    in load_runs. There is no rounds filter: the holdings in a round
+    (measure_holdings) follow from all events up to that round.
+    """
+
+    if os.path.isdir(os.path.join(results_dir, PURCHASE_STORE)):
+        return load_purchases(results_dir, scenario_ids=scenario_ids, columns=columns)
+
+    return _load_csv_runs(results_dir, scenario_ids, None, columns, path_of=purchases_path)
+
+
+def _load_csv_runs(results_dir, scenario_ids, rounds, columns, path_of=None) -> pd.DataFrame:
+    """
+    Read the CSV file path_of(history file) of every run (default: the
+    history file itself) and add the RUN_KEYS parsed from its filename.
+    """
+
+    files = sorted(glob.glob(os.path.join(results_dir, "history_*.csv")))
+    if not files:
+        raise FileNotFoundError(f"No history_*.csv files found in: {os.path.abspath(results_dir)}")
+
+    dfs = []
+    for fp in files:
+        meta = parse_filename(fp)
+        if scenario_ids is not None and meta["scenario_id"] not in scenario_ids:
+            continue
+
+        df = pd.read_csv(path_of(fp) if path_of is not None else fp, usecols=columns)
+        if rounds is not None:
+            df = df[df["round"].isin(list(rounds))]
+        for k in RUN_KEYS:
+            df[k] = meta[k]
+        dfs.append(df)
+
+    if not dfs:
+        raise FileNotFoundError(f"No runs found for scenarios {scenario_ids} in: {os.path.abspath(results_dir)}")
+
+    return pd.concat(dfs, ignore_index=True)
+
+
 def macro_by_round_from_df(df: pd.DataFrame) -> pd.DataFrame:
     """
     Compute per-round satisfaction statistics from agent-level data.
@@ -202,41 +568,60 @@ def macro_by_round_from_df(df: pd.DataFrame) -> pd.DataFrame:
     df = df.dropna(subset=["round"])
     df["round"] = df["round"].astype(int)
 
-    out = (
-        df.groupby("round")["satisfaction"]
-          .agg(
-              avg_satisfaction="mean",
-              sat_p10=lambda x: np.percentile(x, 10),
-              sat_p50=lambda x: np.percentile(x, 50),
-              sat_p90=lambda x: np.percentile(x, 90),
-          )
-          .reset_index()
-    )
-    return out
+    return bands_frame(satisfaction_sketches(df), ["round"])
 
 
-def load_all_satisfaction(results_dir: str = RESULTS_DIR) -> pd.DataFrame:
+def bands_frame(sketches: SketchCollector, key_names) -> pd.DataFrame:
     """
-    Load all history_*.csv files and compute macro stats per round per run (seed).
-    Returns a dataframe with columns:
-    scenario_id, policy_type, flood_regime, seed, round, avg_satisfaction, sat_p10, sat_p50, sat_p90
+    Mean and SATISFACTION_BANDS quantiles of every sketch in a collector:
+    one row per key (columns key_names), sorted by key.
     """
-    files = sorted(glob.glob(os.path.join(results_dir, "history_*.csv")))
-    if not files:
-        raise FileNotFoundError(f"No history_*.csv files found in: {os.path.abspath(results_dir)}")
 
-    macros = []
-    for fp in files:
-        meta = parse_filename(fp)
-        df = pd.read_csv(fp)
+    rows = []
+    for key, sketch in sorted(sketches.items()):
+        row = dict(zip(key_names, key))
+        row["avg_satisfaction"] = sketch.mean
+        for name, q in SATISFACTION_BANDS.items():
+            row[name] = sketch.quantile(q)
+        rows.append(row)
+
+    return pd.DataFrame(rows, columns=[*key_names, "avg_satisfaction", *SATISFACTION_BANDS])
+
+
+def load_satisfaction_sketches(results_dir: str = RESULTS_DIR) -> SketchCollector:
+    """
+    Satisfaction sketches of all runs, with keys RUN_KEYS + round.
+
+    Reads results_dir/satisfaction_counts.csv of a results_format="sketch"
+    sweep when it exists (run_all_experiments removes it when it writes
+    agent-level runs); otherwise counts the satisfaction values of the
+    agent histories (see load_runs). Pool over seeds with
+    sketches.regroup(lambda key: (key[0], key[-1])) for bands per scenario and round.
+    """
+
+    counts_path = os.path.join(results_dir, SATISFACTION_COUNTS)
+    if os.path.exists(counts_path):
+        return load_sketches(counts_path)
+
+    runs = load_runs(results_dir, columns=["round", "satisfaction"])
+    counts = runs.groupby([*RUN_KEYS, "round", "satisfaction"], sort=False).size()
+
+    sketches = SketchCollector()
+    for (*key, value), count in zip(counts.index.tolist(), counts.tolist()):
+        sketches.sketch(tuple(key)).add(value, count)
+    return sketches
 
-        macro = macro_by_round_from_df(df)
-        for k, v in meta.items():
-            macro[k] = v
 
-        macros.append(macro)
+def load_all_satisfaction(results_dir: str = RESULTS_DIR) -> pd.DataFrame:
+    """
+    Load the satisfaction sketches of all runs (see load_satisfaction_sketches)
+    and compute macro stats per round per run (seed).
+    Returns a dataframe with columns:
+    round, avg_satisfaction, sat_p10, sat_p50, sat_p90, scenario_id, flood_regime, policy_type, seed
+    """
 
-    return pd.concat(macros, ignore_index=True)
+    macros = bands_frame(load_satisfaction_sketches(results_dir), [*RUN_KEYS, "round"])
+    return macros[["round", "avg_satisfaction", *SATISFACTION_BANDS, *RUN_KEYS]]
 
 
 def average_over_runs(macro_df: pd.DataFrame) -> pd.DataFrame:
@@ -292,52 +677,28 @@ def plot_satisfaction_by_scenario(results_dir: str = RESULTS_DIR, out_dir: str =
 
         print("Saved:", out_path)
 
-def _split_measures_cell(x):
-    """CSV has measures as 'A;B;C' or empty/NaN."""
-    if pd.isna(x) or str(x).strip() == "":
-        return []
-    return [m.strip() for m in str(x).split(";") if m.strip()]
-
-
-def _scenario_from_filename(fp: str) -> str:
-    """
-    history_R0_random_floods_Baseline_-_0.0_False_N1000_seed43.csv -> "R0"
-    """
-    return os.path.basename(fp).split("_")[1]
-
-
 def load_all_history(results_dir: str = "results") -> pd.DataFrame:
     """
-    Load all history_*.csv files and add a 'scenario' column from the filename.
+    Load all runs (see load_runs) with the new_measures and measures
+    strings rebuilt from their purchase events, and add a 'scenario' column
+    with the scenario id.
     """
 
-    files = glob.glob(os.path.join(results_dir, "history_*.csv"))
-    if not files:
-        raise FileNotFoundError(f"No history_*.csv found in: {os.path.abspath(results_dir)}")
-
-    dfs = []
-    for f in files:
-        df = pd.read_csv(f)
-        df["scenario"] = _scenario_from_filename(f)
-        dfs.append(df)
-
-    out = pd.concat(dfs, ignore_index=True)
+    out = load_runs(results_dir)
+    out["scenario"] = out["scenario_id"]
 
     out["round"] = pd.to_numeric(out["round"], errors="coerce")
     out = out.dropna(subset=["round"])
     out["round"] = out["round"].astype(int)
 
-    return out
+    return measure_columns(out, load_run_purchases(results_dir))
 
 
 def get_all_measures(df: pd.DataFrame) -> list:
     """
     Return sorted list of all measure names that appear in df['measures'].
     """
-    all_measures = set()
-    for x in df["measures"]:
-        all_measures.update(_split_measures_cell(x))
-    return sorted(m for m in all_measures if m != "")
+    return measure_matrix(df["measures"]).columns.tolist()
 
 
 def compute_measure_adoption(df: pd.DataFrame) -> pd.DataFrame:
@@ -349,20 +710,7 @@ def compute_measure_adoption(df: pd.DataFrame) -> pd.DataFrame:
     if "measures" not in df.columns:
         raise KeyError("Missing required column: 'measures'")
 
-    last_round = int(df["round"].max())
-    final = df[df["round"] == last_round]
-
-    scenarios = sorted(final["scenario"].unique())
-    measures = get_all_measures(final)
-
-    table = pd.DataFrame(index=scenarios, columns=measures, dtype=float)
-
-    for s in scenarios:
-        sdf = final[final["scenario"] == s]
-        for m in measures:
-            table.loc[s, m] = sdf["measures"].apply(lambda x: m in _split_measures_cell(x)).mean()
-
-    return table
+    return final_adoption_shares(df, by="scenario").rename_axis(None)
 
 def plot_satisfaction_regime_with_uncertainty(results_dir="results", out_dir="plots"):
     """
@@ -411,7 +759,25 @@ def plot_satisfaction_regime_with_uncertainty(results_dir="results", out_dir="pl
 
         print("Saved:", out)
 
-def plot_measure_adoption_by_scenario(results_dir="results", out_dir="plots"):
+def load_adoption(results_dir="results"):
+    """
+    History rows (agent_id, round and RUN_KEYS) of all runs and a boolean
+    row × measure matrix of the measures each agent holds in that round.
+    """
+
+    runs = load_runs(results_dir, columns=["agent_id", "round"])
+    purchases = load_run_purchases(results_dir, columns=["agent_id", "round", "measure"])
+    return runs, measure_holdings(runs, purchases) > 0
+
+
+def _with_insurance(measures_list):
+    """Flood insurance is always included (even if adoption is 0)."""
+    if "Flood insurance" not in measures_list:
+        measures_list = ["Flood insurance"] + measures_list
+    return measures_list
+
+
+def plot_measure_adoption_by_scenario(results_dir="results", out_dir="plots", adoption=None):
     """
     Makes 4 plots (ever adopted, per-run averaged):
     - R0 vs R2
@@ -419,61 +785,33 @@ def plot_measure_adoption_by_scenario(results_dir="results", out_dir="plots"):
     - S0 vs S2
     - S0 vs S3
 
-    Ever-adopted is computed PER RUN (per CSV), then averaged over runs.
+    Ever-adopted is computed PER RUN (per seed), then averaged over runs.
     Flood insurance is always included (even if adoption is 0).
+
+    adoption: (runs, held) from load_adoption; loaded from results_dir if None.
     """
 
     os.makedirs(out_dir, exist_ok=True)
 
-    files = glob.glob(os.path.join(results_dir, "history_*.csv"))
-    if not files:
-        raise FileNotFoundError(f"No history_*.csv found in {results_dir}")
-
     pairs = [("R0", "R2"), ("R0", "R3"), ("S0", "S2"), ("S0", "S3")]
 
-    sample = pd.read_csv(files[0])
-    agent_col = next(c for c in ["agent_id", "id", "unique_id", "agent"] if c in sample.columns)
-
-    all_df = []
-    for f in files:
-        all_df.append(pd.read_csv(f))
-    all_df = pd.concat(all_df, ignore_index=True)
+    runs, held = adoption if adoption is not None else load_adoption(results_dir)
 
-    measures_list = get_all_measures(all_df)
-
-    if "Flood insurance" not in measures_list:
-        measures_list = ["Flood insurance"] + measures_list
+    ever = ever_adopted_shares(runs, held)
+    measures_list = _with_insurance(ever.columns.tolist())
+    ever = ever.reindex(columns=measures_list, fill_value=0.0) * 100
 
     for a, b in pairs:
-        scenarios = [a, b]
-        results = {s: [] for s in scenarios}
-
-        for scenario in scenarios:
-            scenario_files = [f for f in files if f"_{scenario}_" in os.path.basename(f)]
-            if not scenario_files:
-                raise FileNotFoundError(f"No files found for scenario {scenario}")
-
-            for m in measures_list:
-                per_run = []
-
-                for f in scenario_files:
-                    df = pd.read_csv(f)
-
-                    ever_by_agent = (
-                        df.groupby(agent_col)["measures"]
-                          .apply(lambda series: any(m in _split_measures_cell(x) for x in series))
-                          .mean()
-                    )
-                    per_run.append(ever_by_agent)
-
-                results[scenario].append(np.mean(per_run) * 100)
+        for scenario in (a, b):
+            if scenario not in ever.index:
+                raise FileNotFoundError(f"No runs found for scenario {scenario}")
 
         x = np.arange(len(measures_list))
         width = 0.35
 
         plt.figure(figsize=(12, 5))
-        plt.bar(x - width/2, results[a], width, label=a)
-        plt.bar(x + width/2, results[b], width, label=b)
+        plt.bar(x - width/2, ever.loc[a], width, label=a)
+        plt.bar(x + width/2, ever.loc[b], width, label=b)
 
         plt.xticks(x, measures_list, rotation=45, ha="right")
         plt.ylabel("% of agents that ever adopted")
@@ -492,30 +830,25 @@ def plot_policy_comparison_adoption_bars(results_dir="results", out_dir="plots")
     Makes:
     1) Pairwise EVER-adopted comparison plots (from plot_measure_adoption_by_scenario)
     2) FINAL adoption bar plot for EACH scenario (S0,S2,S3,R0,R2,R3)
+
+    The runs are loaded once for both.
     """
-    import os
-    import matplotlib.pyplot as plt
 
     os.makedirs(out_dir, exist_ok=True)
 
+    runs, held = load_adoption(results_dir)
+
     # 1) Ever-adopted comparison plots (your other function now makes multiple pairs)
-    plot_measure_adoption_by_scenario(results_dir, out_dir)
+    plot_measure_adoption_by_scenario(results_dir, out_dir, adoption=(runs, held))
 
     # 2) Final adoption after last round for EACH scenario
-    df = load_all_history(results_dir)
-    last_round = int(df["round"].max())
-
-    for scenario in sorted(df["scenario"].unique()):
-        final = df[(df["scenario"] == scenario) & (df["round"] == last_round)].copy()
-
-        measures_list = get_all_measures(final)
-
-        if "Flood insurance" not in measures_list:
-            measures_list = ["Flood insurance"] + measures_list
+    last_round = int(runs["round"].max())
+    final = final_adoption_shares(runs, held) * 100.0
 
-        vals = []
-        for m in measures_list:
-            vals.append(final["measures"].apply(lambda x: m in _split_measures_cell(x)).mean() * 100.0)
+    for scenario, shares in final.iterrows():
+        # Measures that occur in this scenario's final round
+        measures_list = _with_insurance(shares.index[shares > 0].tolist())
+        vals = shares.reindex(measures_list, fill_value=0.0)
 
         plt.figure(figsize=(12, 5))
         plt.bar(measures_list, vals)
@@ -531,7 +864,8 @@ def plot_policy_comparison_adoption_bars(results_dir="results", out_dir="plots")
 
 if __name__ == "__main__":
     # 1) Run experiments (only needed if results/ is empty or you changed the model)
-    run_all_experiments(houses_dict, base_seed=42)
+    run_all_experiments(houses_dict, base_seed=42, workers=os.cpu_count(), cache_dir="cache",
+                        catalogue_path=os.path.join(RESULTS_DIR, "runs.sqlite"), rng_streams=True)
 
     # 2) Reproduce plots (reads CSVs from results/ and saves PNGs to plots/)
     plot_policy_comparison_adoption_bars("results", "plots")
@@ -3,14 +3,51 @@ This module handles the collection and storage of simulation history data.
 
 It tracks agent-level outcomes (wealth, satisfaction, flood damage, and
 measure adoption) over multiple rounds and saves the results as CSV files
-for later analysis.
+for later analysis. HistoryRecorder records the same history in
+preallocated NumPy columns.
+
+A saved run consists of two tables: the history (one row per agent and
+round) and the purchase events (one row per purchase with agent_id,
+round, measure and effective cost). The cumulative measures of an agent
+are not stored in every row; measure_holdings and measure_columns rebuild
+them from the purchase events when needed.
+
+With pyarrow installed, save_history_parquet writes both tables to a
+Parquet store partitioned by scenario_id/flood_regime/policy_type instead,
+and load_history / load_purchases read them back with filters pushed down
+to the files.
 """
 
+import numpy as np
 import pandas as pd
+from bisect import bisect_left, bisect_right
 from classes.homeowner_agent import Agent
-from classes.measures import Measure
+from classes.measures import Measure, catalogue as measure_catalogue
+from classes.online_stats import SketchCollector
 from pathlib import Path
 
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # the Parquet store is optional
+    pa = None
+
+PARQUET_AVAILABLE = pa is not None
+
+# Subdirectories of the results directory with the Parquet stores, and their partition columns
+HISTORY_STORE = "history"
+PURCHASE_STORE = "purchases"
+PARTITIONS = ["scenario_id", "flood_regime", "policy_type"]
+
+# Columns that identify one run in the loaded histories
+RUN_KEYS = [*PARTITIONS, "seed"]
+
+# Measure names in catalogue order; the measure code of a purchase event is
+# its position in this list
+MEASURE_NAMES = [m.name for m in measure_catalogue]
+
+
 def save_history(
     history,
     scenario_id,
@@ -20,17 +57,31 @@ def save_history(
     subsidy_level,
     insurance,
     n_agents,
-    seed
+    seed,
+    verbose=True,
+    catalogue=None,
+    runtime=None,
+    results_dir="results",
+    cached=False,
 ):
     """
-    Save the simulation history to a CSV file in the results directory.
+    Save the simulation history (a history dict, DataFrame or
+    HistoryRecorder) to CSV files in results_dir: the history
+    rows to history_<settings>.csv and the purchase events to
+    purchases_<settings>.csv (see history_tables).
 
     The filename encodes the scenario settings to allow easy comparison
-    across experiments.
+    across experiments. With a RunCatalogue the run is also recorded there
+    once the files are written, with its runtime in seconds and summary
+    metrics; cached=True marks a history taken from a ResultCache (it is
+    recorded without runtime).
+
+    Returns:
+        Path: The saved history file.
     """
 
-    results_dir = Path("results")
-    results_dir.mkdir(exist_ok=True)
+    results_dir = Path(results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
 
     filename = (
         f"history_{scenario_id}_"
@@ -44,9 +95,189 @@ def save_history(
     )
 
     path = results_dir / filename
-    pd.DataFrame(history).to_csv(path, index=False)
+    rows, purchases = history_tables(history)
+    rows.to_csv(path, index=False)
+    purchases.to_csv(purchases_path(path), index=False)
+
+    if catalogue is not None:
+        _catalogue_run(catalogue, history, path, runtime, cached, scenario_id, flood_regime, policy_type,
+                       measure, subsidy_level, insurance, n_agents, seed)
+
+    if verbose:
+        print(f"Saved: {path}")
+
+    return path
+
+
+def purchases_path(path):
+    """
+    Purchases CSV that belongs to a history CSV.
+    """
+
+    path = Path(path)
+    return path.with_name("purchases_" + path.name.removeprefix("history_"))
+
+
+def purchase_frame(agent_ids, rounds, measures, costs):
+    """
+    Purchase events as a DataFrame with columns agent_id, round, measure
+    and cost (the effective cost paid, NaN if unknown).
+
+    measure is categorical with MEASURE_NAMES (plus any other names) as
+    categories, so its code is the same in every run.
+    """
+
+    names = MEASURE_NAMES + sorted(set(measures) - set(MEASURE_NAMES))
+    return pd.DataFrame({
+        "agent_id": agent_ids,
+        "round": np.asarray(rounds, dtype=np.int16),
+        "measure": pd.Categorical(measures, categories=names),
+        "cost": np.asarray(costs, dtype=float),
+    })
+
+
+def history_tables(history):
+    """
+    Split a history (dict, DataFrame or HistoryRecorder) into the history
+    rows without the new_measures/measures strings and the purchase events.
+
+    For a history dict or DataFrame the events are read from the strings:
+    the measures held in round 0 and the new_measures of later rounds,
+    with unknown cost.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: History rows, purchase events.
+    """
+
+    if isinstance(history, HistoryRecorder):
+        return history.to_frame(measures=False), history.purchases()
+
+    df = pd.DataFrame(history)
+    bought = df["new_measures"].where(df["round"] != 0, df["measures"])
+    events = (
+        df[["agent_id", "round"]]
+        .assign(measure=bought.fillna("").str.split(";"))
+        .explode("measure")
+    )
+    events = events[events["measure"] != ""].sort_values("round", kind="stable")
+
+    purchases = purchase_frame(
+        events["agent_id"].to_numpy(),
+        events["round"].to_numpy(),
+        events["measure"].to_numpy(),
+        np.full(len(events), np.nan),
+    )
+    return df.drop(columns=["new_measures", "measures"]), purchases
+
+
+def history_summary(history):
+    """
+    Number of rounds and final-round means of a history: satisfaction,
+    purchases per agent and unique measures per agent.
+    """
+
+    if isinstance(history, HistoryRecorder):
+        history.finish()
+        counts = np.diff(history.measure_offsets).tolist()
+        offsets = history.measure_offsets.tolist()
+        codes = history.measure_codes.tolist()
+        unique = [len(set(codes[start:start + count])) for start, count in zip(offsets, counts)]
+        return {
+            "rounds": history.n_rounds,
+            "final_mean_satisfaction": float(history.columns["satisfaction"][-1].mean()),
+            "mean_total_purchases_per_agent": sum(counts) / len(counts),
+            "mean_unique_measures_per_agent": sum(unique) / len(unique),
+        }
+
+    df = pd.DataFrame(history)
+    last_round = int(df["round"].max())
+    final = df[df["round"] == last_round]
+    measures = [[m for m in str(x).split(";") if m] if isinstance(x, str) else [] for x in final["measures"]]
+    return {
+        "rounds": last_round,
+        "final_mean_satisfaction": float(final["satisfaction"].mean()),
+        "mean_total_purchases_per_agent": sum(len(m) for m in measures) / len(measures),
+        "mean_unique_measures_per_agent": sum(len(set(m)) for m in measures) / len(measures),
+    }
+
+
+def satisfaction_sketches(history, key=()):
+    """
+    Satisfaction distribution of every round of one run (a HistoryRecorder,
+    history dict or DataFrame) as a SketchCollector with keys key + (round,).
+    """
+
+    collector = SketchCollector()
 
-    print(f"Saved: {path}")
+    if isinstance(history, HistoryRecorder):
+        for round_nr, values in enumerate(history.columns["satisfaction"]):
+            collector.add((*key, round_nr), values)
+        return collector
+
+    df = pd.DataFrame(history)
+    for round_nr, values in df.groupby("round")["satisfaction"]:
+        collector.add((*key, int(round_nr)), values.to_numpy())
+    return collector
+
+
+def save_sketches(collector, path, key_names, value_name="satisfaction"):
+    """
+    Save the counts of a SketchCollector to a CSV file with the columns
+    key_names, value_name and count (one row per key and value).
+
+    Returns:
+        Path: The saved file.
+    """
+
+    rows = [
+        (*key, value, count)
+        for key, sketch in sorted(collector.items())
+        for value, count in sorted(sketch.counts.items())
+    ]
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows, columns=[*key_names, value_name, "count"]).to_csv(path, index=False)
+    return path
+
+
+def load_sketches(path, value_name="satisfaction"):
+    """
+    Load a SketchCollector saved with save_sketches; its keys are the
+    other columns of the file, in file order.
+    """
+
+    df = pd.read_csv(path)
+    key_names = [c for c in df.columns if c not in (value_name, "count")]
+
+    collector = SketchCollector()
+    keys = zip(*(df[c].tolist() for c in key_names))
+    for key, value, count in zip(keys, df[value_name].tolist(), df["count"].tolist()):
+        collector.sketch(key).add(value, count)
+    return collector
+
+
+def _catalogue_run(catalogue, history, path, runtime, cached, scenario_id, flood_regime, policy_type,
+                   measure, subsidy_level, insurance, n_agents, seed):
+    """
+    Record a saved experiment run in a RunCatalogue.
+    """
+
+    catalogue.record({
+        "runner": "experiment",
+        "scenario_id": scenario_id,
+        "flood_regime": flood_regime,
+        "policy_type": policy_type,
+        "measure": measure,
+        "subsidy_level": subsidy_level,
+        "insurance": insurance,
+        "seed": seed,
+        "n_agents": n_agents,
+        "runtime_s": None if cached else runtime,
+        "cached": cached,
+        "path": path,
+        **history_summary(history),
+    })
 
 def initialise_history():
     """
@@ -120,4 +351,438 @@ def add_round_zero(history, agents):
         history["measures"].append(";".join(sorted(current)))
 
         agent._prev_measures_set = current
-        agent._prev_measures_len = len(agent.adopted_measures)
\ No newline at end of file
+        agent._prev_measures_len = len(agent.adopted_measures)
+
+class HistoryRecorder:
+    """
+    Columnar recorder of the same history as initialise_history /
+    update_history / add_round_zero.
+
+    The columns are NumPy arrays of shape (rounds + 1, N), allocated up
+    front. The flood draw is stored once per round. Measures are read once,
+    by finish(): every (measure, round) entry of adopted_measures becomes a
+    measure code and a purchase round, from which the purchase events
+    (purchases()) and the measure strings of every row are rebuilt. The
+    strings and the DataFrames are only built by to_frame() and purchases().
+
+    Rows must be recorded after all agents have stepped in a round; an
+    agent's state is only changed by its own step, so the rows are the same
+    as when recording right after each agent's step.
+    """
+
+    def __init__(self, agents, n_rounds):
+        """
+        Args:
+            agents (list of Agent): Agents to record, in row order.
+            n_rounds (int): Number of rounds after round 0.
+        """
+
+        self.agents = agents
+        self.n_rounds = n_rounds
+        self.agent_ids = [agent.ID for agent in agents]
+        self.columns = {}
+        self.flood_results = [None] * (n_rounds + 1)
+
+        # Filled by finish(): measure codes per agent, their names, and the
+        # round and effective cost of every purchase
+        self.measure_codes = None
+        self.measure_offsets = None
+        self.measure_names = None
+        self.measure_rounds = None
+        self.measure_costs = None
+
+    def _store(self, name, round_nr, values):
+        """
+        Store one round of a column; ints are upcast to float when a
+        float appears, as pandas does for a list of mixed numbers.
+        """
+
+        values = np.asarray(values)
+        column = self.columns.get(name)
+        if column is None:
+            column = np.zeros((self.n_rounds + 1, len(self.agents)), dtype=values.dtype)
+        elif np.result_type(column, values) != column.dtype:
+            column = column.astype(np.result_type(column, values))
+        column[round_nr] = values
+        self.columns[name] = column
+
+    def record(self, round_nr, flood_results=None):
+        """
+        Record the state of all agents after round round_nr (0: baseline).
+        """
+
+        agents = self.agents
+        self._store("satisfaction", round_nr, [agent.satisfaction for agent in agents])
+        self._store("wealth", round_nr, [agent.wealth for agent in agents])
+
+        if round_nr == 0:
+            self._store("flood_damages", 0, [0] * len(agents))
+        else:
+            self._store("flood_damages", round_nr, [
+                agent.damage_history[-1]["damage_cost"] if agent.damage_history else 0 for agent in agents
+            ])
+            self.flood_results[round_nr] = flood_results
+
+    def finish(self):
+        """
+        Store the final measure codes of every agent, with the round and
+        effective cost of each purchase, and release the agents.
+
+        The round is the one stored with the purchase in adopted_measures;
+        measures with round 0 were held before the run and get cost NaN.
+        """
+
+        if self.agents is None:
+            return
+
+        names = {}
+        codes = []
+        rounds = []
+        bought = []
+        offsets = [0]
+        for agent in self.agents:
+            for measure, round_nr in agent.adopted_measures:
+                codes.append(names.setdefault(measure.name, len(names)))
+                rounds.append(round_nr)
+                bought.append(measure)
+            offsets.append(len(codes))
+
+        self.measure_codes = np.array(codes, dtype=np.int16)
+        self.measure_offsets = np.array(offsets, dtype=np.int64)
+        self.measure_names = list(names)
+        self.measure_rounds = np.array(rounds, dtype=np.int16)
+
+        owner = np.repeat(np.arange(len(self.agents)), np.diff(self.measure_offsets))
+        self.measure_costs = np.array([
+            self.agents[i].get_effective_cost(measure, r) if r > 0 else np.nan
+            for i, measure, r in zip(owner.tolist(), bought, rounds)
+        ], dtype=float)
+
+        self.agents = None
+
+    def purchases(self):
+        """
+        Purchase events as a DataFrame (see purchase_frame), by round and
+        in purchase order within an agent.
+        """
+
+        self.finish()
+
+        owner = np.repeat(np.arange(len(self.agent_ids)), np.diff(self.measure_offsets))
+        order = np.argsort(self.measure_rounds, kind="stable")
+        names = np.array(self.measure_names, dtype=object)
+
+        return purchase_frame(
+            agent_ids=np.asarray(self.agent_ids)[owner[order]],
+            rounds=self.measure_rounds[order],
+            measures=names[self.measure_codes[order]] if len(order) else [],
+            costs=self.measure_costs[order],
+        )
+
+    def to_frame(self, measures=True):
+        """
+        History as a DataFrame with the columns of initialise_history.
+
+        Args:
+            measures (bool): Include the new_measures and measures strings;
+                without them the rows only hold the agent state, and the
+                measures are in purchases().
+        """
+
+        self.finish()
+
+        n_rows = self.n_rounds + 1
+        n_agents = len(self.agent_ids)
+
+        flood_results = np.empty(n_rows, dtype=object)
+        flood_results[:] = self.flood_results
+
+        df = pd.DataFrame({
+            "round": np.repeat(np.arange(n_rows), n_agents),
+            "agent_id": np.tile(np.asarray(self.agent_ids), n_rows),
+            "satisfaction": self.columns["satisfaction"].ravel(),
+            "wealth": self.columns["wealth"].ravel(),
+            "flood_results": np.repeat(flood_results, n_agents),
+            "flood_damages": self.columns["flood_damages"].ravel(),
+        })
+        if not measures:
+            return df
+
+        codes = self.measure_codes.tolist()
+        offsets = self.measure_offsets.tolist()
+        counts = self._measure_counts().tolist()
+        agent_names = [[self.measure_names[c] for c in codes[offsets[i]:offsets[i + 1]]] for i in range(n_agents)]
+
+        held = [";".join(sorted(set(names[:count]))) for names, count in zip(agent_names, counts[0])]
+        new_measures = [""] * n_agents
+        for r in range(1, n_rows):
+            for names, prev, count in zip(agent_names, counts[r - 1], counts[r]):
+                held.append(";".join(names[:count]))
+                new_measures.append(";".join(names[prev:count]))
+
+        df["new_measures"] = new_measures
+        df["measures"] = held
+        return df
+
+    def _measure_counts(self):
+        """
+        Number of measures of every agent after each round, shape (rounds + 1, N).
+        """
+
+        owner = np.repeat(np.arange(len(self.agent_ids)), np.diff(self.measure_offsets))
+        counts = np.zeros((self.n_rounds + 1, len(self.agent_ids)), dtype=np.int64)
+        np.add.at(counts, (self.measure_rounds, owner), 1)
+        return counts.cumsum(axis=0)
+
+    @property
+    def nbytes(self):
+        """
+        Memory of the recorded columns in bytes.
+        """
+
+        arrays = list(self.columns.values())
+        if self.measure_codes is not None:
+            arrays += [self.measure_codes, self.measure_offsets, self.measure_rounds, self.measure_costs]
+        return sum(a.nbytes for a in arrays)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The Parquet results store requires pyarrow (pip install pyarrow)")
+
+
+def _history_frame(df):
+    """
+    History rows (see history_tables) with typed columns for the Parquet store.
+
+    The flood_results dictionaries are split into rain_damage and
+    river_damage columns (missing in round 0).
+    """
+
+    floods = df.pop("flood_results")
+    df.insert(4, "rain_damage", pd.array([None if f is None else f["rain_damage"] for f in floods], dtype="Int16"))
+    df.insert(5, "river_damage", pd.array([None if f is None else f["river_damage"] for f in floods], dtype="Int16"))
+
+    df["round"] = df["round"].astype(np.int16)
+    if pd.api.types.is_integer_dtype(df["agent_id"]):
+        df["agent_id"] = df["agent_id"].astype(np.int32)
+    return df
+
+
+# Code that builds a recorded history and its tables; a ResultCache key of
+# a cached HistoryRecorder must include its version (see code_version)
+HISTORY_CODE = (HistoryRecorder, history_tables, purchase_frame, _history_frame)
+
+
+def save_history_parquet(
+    history,
+    scenario_id,
+    flood_regime,
+    policy_type,
+    measure,
+    subsidy_level,
+    insurance,
+    n_agents,
+    seed,
+    verbose=True,
+    catalogue=None,
+    runtime=None,
+    results_dir="results",
+    cached=False,
+):
+    """
+    Save the simulation history to the Parquet stores in the results directory.
+
+    The history rows are written to
+    results/history/scenario_id=.../flood_regime=.../policy_type=.../seed<seed>.parquet
+    and the purchase events to the same path under results/purchases
+    (zstd compressed). The partition values are part of the path; the other
+    scenario settings and the seed are stored as columns of the history,
+    the seed also as a column of the purchases. With a RunCatalogue the run
+    is also recorded there (see save_history).
+
+    Returns:
+        Path: The saved history file.
+    """
+
+    _require_pyarrow()
+
+    rows, purchases = history_tables(history)
+
+    df = _history_frame(rows)
+    df["measure"] = measure
+    df["subsidy_level"] = float(subsidy_level)
+    df["insurance"] = bool(insurance)
+    df["n_agents"] = np.int32(n_agents)
+    df["seed"] = np.int64(seed)
+
+    if pd.api.types.is_integer_dtype(purchases["agent_id"]):
+        purchases["agent_id"] = purchases["agent_id"].astype(np.int32)
+    purchases["seed"] = np.int64(seed)
+
+    partition = f"scenario_id={scenario_id}/flood_regime={flood_regime}/policy_type={policy_type}"
+    for store, table in [(HISTORY_STORE, df), (PURCHASE_STORE, purchases)]:
+        directory = Path(results_dir) / store / partition
+        directory.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(table, preserve_index=False), directory / f"seed{seed}.parquet",
+                       compression="zstd")
+
+    path = Path(results_dir) / HISTORY_STORE / partition / f"seed{seed}.parquet"
+
+    if catalogue is not None:
+        _catalogue_run(catalogue, history, path, runtime, cached, scenario_id, flood_regime, policy_type,
+                       measure, subsidy_level, insurance, n_agents, seed)
+
+    if verbose:
+        print(f"Saved: {path}")
+
+    return path
+
+
+def load_history(results_dir="results", scenario_ids=None, rounds=None, columns=None):
+    """
+    Load the history rows of the runs in the Parquet store as one DataFrame.
+
+    Filters on scenario and round are pushed down to the files, so only
+    the matching partitions and row groups are read.
+
+    Args:
+        results_dir (str): Directory that contains the store.
+        scenario_ids (iterable of str, optional): Scenarios to load.
+        rounds (iterable of int, optional): Rounds to load.
+        columns (list of str, optional): Columns to load; the partition
+            columns and seed are always included.
+
+    Returns:
+        pd.DataFrame: History rows with scenario_id, flood_regime,
+        policy_type and seed columns.
+    """
+
+    return _load_store(HISTORY_STORE, results_dir, scenario_ids, rounds, columns)
+
+
+def load_purchases(results_dir="results", scenario_ids=None, columns=None):
+    """
+    Load the purchase events of the runs in the Parquet store as one
+    DataFrame, filtered on scenario as in load_history. All rounds are
+    read, since measure_holdings needs every event up to a round.
+
+    Returns:
+        pd.DataFrame: Events with agent_id, round, measure and cost, and
+        the RUN_KEYS columns.
+    """
+
+    return _load_store(PURCHASE_STORE, results_dir, scenario_ids, None, columns)
+
+
+def _load_store(store, results_dir, scenario_ids, rounds, columns):
+    _require_pyarrow()
+
+    partitioning = ds.partitioning(pa.schema([(name, pa.string()) for name in PARTITIONS]), flavor="hive")
+    dataset = ds.dataset(Path(results_dir) / store, format="parquet", partitioning=partitioning)
+
+    condition = None
+    if scenario_ids is not None:
+        condition = ds.field("scenario_id").isin(list(scenario_ids))
+    if rounds is not None:
+        in_rounds = ds.field("round").isin(list(rounds))
+        condition = in_rounds if condition is None else condition & in_rounds
+
+    if columns is not None:
+        columns = list(columns) + [c for c in RUN_KEYS if c not in columns]
+
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def _run_agents(history, purchases):
+    """
+    Index of the (run, agent) of every history row and purchase event.
+
+    Runs are identified by the RUN_KEYS columns present in both frames
+    (none for a single run); events of agents without history rows get -1.
+    """
+
+    keys = [k for k in RUN_KEYS if k in history.columns and k in purchases.columns] + ["agent_id"]
+    agents = pd.MultiIndex.from_frame(history[keys]).unique()
+    rows = agents.get_indexer(pd.MultiIndex.from_frame(history[keys]))
+    events = agents.get_indexer(pd.MultiIndex.from_frame(purchases[keys]))
+    return len(agents), rows, events
+
+
+def _measure_codes(purchases):
+    """
+    Measure names and the code of every purchase event.
+    """
+
+    # Map the categories (few) instead of the strings of all events
+    measure = purchases["measure"].astype("category")
+    categories = [str(c) for c in measure.cat.categories]
+    names = MEASURE_NAMES + sorted(set(categories) - set(MEASURE_NAMES))
+    code_of = np.array([names.index(c) for c in categories], dtype=np.int64)
+    return names, code_of[measure.cat.codes.to_numpy()]
+
+
+def measure_holdings(history, purchases):
+    """
+    Cumulative measure holdings of every history row, rebuilt from the
+    purchase events.
+
+    Args:
+        history (pd.DataFrame): History rows with agent_id, round and the
+            RUN_KEYS columns (as from load_history, or one run).
+        purchases (pd.DataFrame): Purchase events of the same runs.
+
+    Returns:
+        pd.DataFrame: One column per measure with the number of units an
+        agent has bought up to and including the round of the row, indexed
+        like history.
+    """
+
+    names, codes = _measure_codes(purchases)
+    n_agents, rows, events = _run_agents(history, purchases)
+
+    round_nrs = history["round"].to_numpy(dtype=np.int64)
+    n_rounds = int(round_nrs.max()) + 1 if len(round_nrs) else 0
+    event_rounds = purchases["round"].to_numpy(dtype=np.int64)
+    keep = (events >= 0) & (event_rounds < n_rounds)
+
+    counts = np.zeros((n_agents, n_rounds, len(names)), dtype=np.int32)
+    np.add.at(counts, (events[keep], event_rounds[keep], codes[keep]), 1)
+    np.cumsum(counts, axis=1, out=counts)
+
+    return pd.DataFrame(counts[rows, round_nrs], index=history.index, columns=names)
+
+
+def measure_columns(history, purchases):
+    """
+    History with the new_measures and measures strings of the old format
+    ('A;B;C' in purchase order), rebuilt from the purchase events.
+    """
+
+    n_agents, rows, events = _run_agents(history, purchases)
+    names, codes = _measure_codes(purchases)
+    round_nrs = history["round"].tolist()
+
+    # Purchases per agent, by round and in purchase order within a round
+    order = np.argsort(purchases["round"].to_numpy(), kind="stable")
+    bought_rounds = [[] for _ in range(n_agents)]
+    bought_names = [[] for _ in range(n_agents)]
+    for i, r, name in zip(events[order].tolist(), purchases["round"].to_numpy()[order].tolist(),
+                          np.array(names, dtype=object)[codes[order]].tolist()):
+        if i >= 0:
+            bought_rounds[i].append(r)
+            bought_names[i].append(name)
+
+    new_measures = []
+    held = []
+    for i, r in zip(rows.tolist(), round_nrs):
+        start = bisect_left(bought_rounds[i], r)
+        end = bisect_right(bought_rounds[i], r)
+        if r == 0:
+            held.append(";".join(sorted(set(bought_names[i][:end]))))
+            new_measures.append("")
+        else:
+            held.append(";".join(bought_names[i][:end]))
+            new_measures.append(";".join(bought_names[i][start:end]))
+
+    return history.assign(new_measures=new_measures, measures=held)
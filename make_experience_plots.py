@@ -11,12 +11,19 @@ import matplotlib.pyplot as plt
 import os
 import argparse # Om waarden via terminal mee te geven
 
+from classes.run_catalogue import RunCatalogue
 
-def main(excel_path, output_folder, top_k):
+
+def main(excel_path, output_folder, top_k, catalogue_path=None):
 
     os.makedirs(output_folder, exist_ok=True)
 
-    df_summary = pd.read_excel(excel_path, sheet_name="ScenarioSummary")
+    if catalogue_path is not None:
+        # Samenvatting per scenario uit de run-catalogus (SQLite) in plaats van de Excel
+        df_summary = pd.DataFrame(RunCatalogue(catalogue_path).scenario_summary(runner="run_scenarios"))
+        df_summary["scenario"] = df_summary["scenario_id"].astype(int)
+    else:
+        df_summary = pd.read_excel(excel_path, sheet_name="ScenarioSummary")
     df_topk = pd.read_excel(excel_path, sheet_name="MeasureTopK")
 
     
@@ -92,7 +99,8 @@ if __name__ == "__main__":
     parser.add_argument("--excel", default="ScenarioResults.xlsx")
     parser.add_argument("--out", default="figures_experience_effect")
     parser.add_argument("--topk", type=int, default=5)
+    parser.add_argument("--catalogue", default=None, help="bijv. results/runs.sqlite")
 
     args = parser.parse_args()
 
-    main(args.excel, args.out, args.topk)
\ No newline at end of file
+    main(args.excel, args.out, args.topk, args.catalogue)
\ No newline at end of file
@@ -15,6 +15,7 @@ from classes.homeowner_agent import Agent # type: ignore
 from classes.measures import measures # type: ignore
 from classes.hazard_generator import floods # type: ignore
 from classes.initialisation import (initialise_agents_n, initialise_agents)
+from classes.housing_market import HousingMarket
 
 from classes.visualise import (plot_macro_satisfaction, plot_satisfaction_distribution, 
                                     plot_subsidy_effect_summary, plot_total_new_measures_per_round, 
@@ -30,7 +31,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import random
 
-from data.houses_dict import houses_dict, generate_houses_from_agents # type: ignore
+from data.houses_dict import houses_dict, generate_house_table_from_agents # type: ignore
 
 def run_single_simulation(seed=None, n_agents=100): #TOEGEVOEGD JULIETTE
     """
@@ -41,7 +42,7 @@ def run_single_simulation(seed=None, n_agents=100): #TOEGEVOEGD JULIETTE
     random.seed(seed)
 
     agents = initialise_agents_n(n=n_agents, seed=seed)
-    big_houses_dict = generate_houses_from_agents(
+    big_houses_dict = HousingMarket(generate_house_table_from_agents(
         houses_dict,
         agents,
         target_n_houses=2000,
@@ -49,7 +50,7 @@ def run_single_simulation(seed=None, n_agents=100): #TOEGEVOEGD JULIETTE
         affordability_quantile=0.95,
         house_price_quantile=0.20,
         jitter=0.10
-    )
+    ))
 
     for round_nr in range(1, 5):
         flood_results = floods()
@@ -74,8 +75,8 @@ if __name__ == "__main__":
     # Initialise 1000 agents
     agents = initialise_agents_n(n=10, seed=42)
     # Initialise houses
-    big_houses_dict = generate_houses_from_agents(houses_dict, agents, target_n_houses=2000, seed=42, affordability_quantile=0.95, 
-                                                  house_price_quantile=0.20, jitter=0.10)
+    big_houses_dict = HousingMarket(generate_house_table_from_agents(houses_dict, agents, target_n_houses=2000, seed=42, affordability_quantile=0.95, 
+                                                  house_price_quantile=0.20, jitter=0.10))
     
     
     # Add history round 0
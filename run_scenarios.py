@@ -12,9 +12,10 @@
 
 
 import random
+import time
 from collections import Counter
-from statistics import mean, stdev
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
@@ -23,53 +24,55 @@ from openpyxl.worksheet.table import Table, TableStyleInfo
 from classes.measures import measures  # lijst met maatregelen
 from classes.hazard_generator import floods
 from classes.scenario_initialisation import initialise_scenario_population
+from classes.population import Population
+from classes.rng_streams import RunStreams
+from classes.result_cache import ResultCache, code_version
+from classes.run_catalogue import RunCatalogue
+from classes.online_stats import ReplicateSummary, RunningStats
+from classes.stopping_rule import precision_reached
+from classes.ocba import approx_pcs, best_index, ocba_increments
+from classes.homeowner_agent import shared_params
+from classes.housing_market import HousingMarket
 
-from data.houses_dict import houses_dict, generate_houses_from_agents  # type: ignore
+from data.houses_dict import houses_dict, generate_house_table_from_agents  # type: ignore
 
 
 
-# Wat wil ik weten?
-
-def unique_measures_of_agent(agent) -> set[str]:
-    """Unieke maatregelen minimaal een keer geadopteerd, dus hoeveel soorten."""
-    return set(m.name for (m, r) in getattr(agent, "adopted_measures", []))
-
-
-def total_purchases_of_agent(agent) -> int:
-    """Totaal aantal aankppen inclusief herhalingen."""
-    return len(getattr(agent, "adopted_measures", []))
+def scenario_houses(agents, seed: Optional[int], rng: Optional[random.Random] = None):
+    """Genereert de huizenmarkt (2000 huizen) voor 1 herhaling, met zoekindex."""
+    return HousingMarket(generate_house_table_from_agents(
+        houses_dict,
+        agents,
+        target_n_houses=2000,
+        seed=seed,
+        affordability_quantile=0.95,
+        house_price_quantile=0.20,
+        jitter=0.10,
+        rng=rng,
+    ))
 
 
-def adoption_rates(agents) -> Dict[str, float]:
-    """ Per maatregel, het aantal keer geadopteerd.
+def run_rngs(seed: Optional[int], rng: Optional[random.Random] = None, streams: Optional[RunStreams] = None):
     """
-    N = len(agents)
-    c = Counter()
-    for a in agents:
-        for name in unique_measures_of_agent(a):
-            c[name] += 1
-    return {name: c[name] / N for name in c}
+    Random generators (populatie, markt, overstromingen) voor 1 herhaling.
 
+    Zonder streams: 1 generator (rng, standaard de globale random module)
+    geseed met seed voor populatie en overstromingen, en de markt met
+    random.Random(seed), zoals altijd. Met streams: de eigen stromen van
+    RunStreams, en seed wordt niet gebruikt.
 
-def scenario_core_stats(agents) -> Dict[str, float]: # Geeft gemiddeld aantal maatregelen per agent en gemiddeld aantal unieke maatregelen per agent, en satis.
-    
-    unique_counts = [len(unique_measures_of_agent(a)) for a in agents]
-    total_counts = [total_purchases_of_agent(a) for a in agents]
-    sats = [float(getattr(a, "satisfaction", 0.0)) for a in agents]
+    Returns:
+        tuple: (seed, population_rng, market_rng, flood_rng); seed is None
+        bij streams, zodat de stromen niet opnieuw geseed worden.
+    """
+    if streams is not None:
+        return None, streams.population, streams.market, streams.floods
 
-    return {
-        "mean_unique_measures_per_agent": mean(unique_counts),
-        "mean_total_purchases_per_agent": mean(total_counts),
-        "mean_satisfaction": mean(sats),
-    }
+    if rng is None:
+        rng = random
+    rng.seed(seed)
+    return seed, rng, None, rng
 
-def purchase_counts(agents) -> Counter:  # Geeft per maatregel aan hoe vaak deze is gekocht, inclusief herhalingen
-    
-    c = Counter()
-    for a in agents:
-        for (m, r) in getattr(a, "adopted_measures", []):
-            c[m.name] += 1
-    return c
 
 def run_one_simulation(
     wealth_class: str,
@@ -77,11 +80,23 @@ def run_one_simulation(
     n_agents: int,
     seed: int,
     n_rounds: int = 4,
+    engine: str = "agents",
+    rng: Optional[random.Random] = None,
+    streams: Optional[RunStreams] = None,
 ):
     """
     Runt model voor 1 herhaling en geeft agenten na n_rounds.
+
+    engine="agents" runt agent.step per agent, engine="population" runt
+    dezelfde regels met de array-engine (classes.population) en geeft
+    identieke agenten terug.
+
+    rng is een eigen random generator (standaard de globale random module);
+    hij wordt met seed geseed en geeft dan dezelfde trekkingen. Met streams
+    (RunStreams) trekken populatie, markt en overstromingen elk uit een
+    eigen onafhankelijke stroom.
     """
-    random.seed(seed)
+    seed, population_rng, market_rng, flood_rng = run_rngs(seed, rng, streams)
 
     # 1) Scenario specifieke populatie
     agents = initialise_scenario_population(
@@ -89,35 +104,254 @@ def run_one_simulation(
         seed=seed,
         wealth_class=wealth_class,
         experience_level=experience_level,
+        rng=population_rng,
     )
 
     # 2) Huizenmarkt, want volledig onafhankelijke simulatie
-    big_houses_dict = generate_houses_from_agents(
-        houses_dict,
-        agents,
-        target_n_houses=2000,
-        seed=seed,
-        affordability_quantile=0.95,
-        house_price_quantile=0.20,
-        jitter=0.10,
-    )
+    big_houses_dict = scenario_houses(agents, seed, rng=market_rng)
 
     # 3) Run rounds
+    if engine == "population":
+        population = Population.from_agents(agents)
+        for round_nr in range(1, n_rounds + 1):
+            flood_results = floods(rng=flood_rng)
+            population.step(big_houses_dict, measures, flood_results, current_round=round_nr)
+        return population.to_agents()
+
+    if engine != "agents":
+        raise ValueError(f"Unknown engine: {engine}")
+
     for round_nr in range(1, n_rounds + 1):
-        flood_results = floods()
+        flood_results = floods(rng=flood_rng)
         for agent in agents:
             agent.step(big_houses_dict, measures, flood_results, current_round=round_nr)
 
     return agents
 
 
+def run_replicate_batch(
+    wealth_class: str,
+    experience_level: str,
+    n_agents: int,
+    seeds: List[int],
+    n_rounds: int = 4,
+    rng: Optional[random.Random] = None,
+    streams: Optional[List[RunStreams]] = None,
+) -> Iterator[list]:
+    """
+    Runt R herhalingen tegelijk als 1 gebatchte populatie (replicate x agent).
+
+    Elke herhaling krijgt, net als in run_one_simulation, een eigen populatie,
+    huizenmarkt en overstromingen op basis van zijn seed. Agent.step gebruikt
+    geen random, dus de overstromingen van alle rondes kunnen direct na de
+    initialisatie getrokken worden: dat geeft dezelfde trekkingen als in de
+    seriele run. Geeft per seed dezelfde agenten als run_one_simulation,
+    1 herhaling tegelijk: de agenten van een herhaling worden pas gemaakt
+    als de vorige is opgehaald (Population.to_replicates).
+
+    streams geeft per herhaling een RunStreams in plaats van een seed.
+    """
+    agent_lists = []
+    markets = []
+    flood_draws = []
+
+    for rep, seed in enumerate(seeds):
+        seed, population_rng, market_rng, flood_rng = run_rngs(
+            seed, rng, streams[rep] if streams is not None else None
+        )
+        agents = initialise_scenario_population(
+            n=n_agents,
+            seed=seed,
+            wealth_class=wealth_class,
+            experience_level=experience_level,
+            rng=population_rng,
+        )
+        agent_lists.append(agents)
+        markets.append(scenario_houses(agents, seed, rng=market_rng))
+        flood_draws.append([floods(rng=flood_rng) for _ in range(n_rounds)])
+
+    population = Population.from_replicates(agent_lists)
+    for round_nr in range(1, n_rounds + 1):
+        flood_results = [draws[round_nr - 1] for draws in flood_draws]
+        population.step(markets, measures, flood_results, current_round=round_nr)
+
+    return population.to_replicates()
+
+
+def rep_stats(agents) -> dict:
+    """
+    Compacte samenvatting van 1 herhaling: alleen wat run_all_scenarios
+    nodig heeft, zodat workers geen volledige agentlijsten terugsturen.
+
+    Gemiddeld aantal unieke maatregelen, aankopen en tevredenheid per
+    agent en het aantal aankopen per maatregel, in 1 keer door de agenten.
+    """
+    N = len(agents)
+    unique_total = 0
+    purchases_total = 0
+    sat = RunningStats()
+    purchases = Counter()
+
+    for a in agents:
+        unique_total += a.adopted_mask.bit_count()
+
+        adopted = getattr(a, "adopted_measures", [])
+        purchases_total += len(adopted)
+        for (m, r) in adopted:
+            purchases[m.name] += 1
+
+        sat.add(float(getattr(a, "satisfaction", 0.0)))
+
+    return {
+        "mean_unique_measures_per_agent": unique_total / N,
+        "mean_total_purchases_per_agent": purchases_total / N,
+        "mean_satisfaction": sat.mean,
+        "purchase_counts": purchases,
+    }
+
+
+def run_scenario_job(job: tuple) -> List[dict]:
+    """
+    Runt 1 job (w, e, N, seeds, n_rounds, engine, stream_keys, cache_dir,
+    cache_keys) en geeft rep_stats per seed.
+
+    Top-level functie, zodat hij in een process pool gebruikt kan worden.
+    Elke job trekt uit een eigen random generator (dezelfde trekkingen als
+    de globale random module met dezelfde seed), dus jobs kunnen ook in
+    threads naast elkaar draaien. Met stream_keys (per seed een
+    (base_seed, scenario_id, rep)) krijgt elke herhaling een RunStreams.
+    Met cache_dir wordt elke herhaling direct na afloop onder zijn
+    cache_key opgeslagen, zodat een afgebroken run later verder kan.
+    """
+    w, e, N, seeds, n_rounds, engine, stream_keys, cache_dir, cache_keys = job
+    rng = random.Random()
+    streams = [RunStreams(*key) for key in stream_keys] if stream_keys is not None else [None] * len(seeds)
+    start = time.perf_counter()
+    batch_runtime = 0.0
+    if engine == "batched":
+        rep_streams = streams if stream_keys is not None else None
+        # de agenten van een herhaling worden pas gemaakt als de vorige samengevat is
+        rep_agents = run_replicate_batch(w, e, N, seeds, n_rounds=n_rounds, rng=rng, streams=rep_streams)
+        batch_runtime = (time.perf_counter() - start) / len(seeds)
+        start = time.perf_counter()
+    else:
+        rep_agents = (
+            run_one_simulation(w, e, N, seed, n_rounds=n_rounds, engine=engine, rng=rng, streams=run_streams)
+            for seed, run_streams in zip(seeds, streams)
+        )
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    results = []
+    for agents, cache_key in zip(rep_agents, cache_keys):
+        stats = rep_stats(agents)
+        del agents  # loslaten voordat de volgende herhaling gemaakt wordt
+
+        # looptijd per herhaling (gebatcht: gedeelde simulatietijd plus eigen conversie)
+        now = time.perf_counter()
+        stats["runtime_s"] = batch_runtime + now - start
+        start = now
+
+        if cache is not None:
+            cache.put(cache_key, stats)
+        results.append(stats)
+    return results
+
+
+# Uitkomsten per herhaling waarvan de precisie bepaalt wanneer een scenario klaar is
+CI_METRICS = ("mean_satisfaction", "mean_total_purchases_per_agent")
+
+# Uitkomsten per herhaling die run_all_scenarios samenvat (gemiddelde en sd)
+SUMMARY_METRICS = ("mean_unique_measures_per_agent", "mean_total_purchases_per_agent", "mean_satisfaction")
+
+# Uitkomst waarop allocation="ocba" het beste scenario selecteert (hoogste gemiddelde)
+OCBA_METRIC = "mean_satisfaction"
+
+
+# Functies waarvan de uitkomst van een herhaling afhangt (versie in de cache-sleutel)
+SIMULATION_CODE = (run_rngs, scenario_houses, run_one_simulation, run_replicate_batch, rep_stats, RunningStats)
+
+
+def rep_cache_key(cache: ResultCache, w: str, e: str, N: int, seed: int, n_rounds: int, stream_key) -> str:
+    """
+    Cache-sleutel van 1 herhaling: scenario, seed (of RunStreams-key),
+    agent-parameters en de versie van de modelcode en van SIMULATION_CODE
+    (niet de Excel-export en plots van dit script). De engine hoort er
+    niet bij: alle engines geven dezelfde resultaten.
+    """
+    return cache.key(
+        runner="run_scenarios",
+        wealth=w,
+        experience=e,
+        N=N,
+        n_rounds=n_rounds,
+        seed=seed if stream_key is None else None,
+        stream_key=stream_key,
+        params=shared_params({"experience_source": "scenario"}),
+        code=code_version(*SIMULATION_CODE),
+    )
+
+
 # Scenario experiment (27 scenarios)
 def run_all_scenarios(
     n_reps: int = 10,
     base_seed: int = 1000,
     n_rounds: int = 4,
     top_k_measures: int = 5,
+    engine: str = "agents",
+    workers: Optional[int] = None,
+    executor: str = "process",
+    rng_streams: bool = False,
+    cache_dir: Optional[str] = None,
+    target_rel_ci: Optional[float] = None,
+    batch_size: int = 10,
+    confidence: float = 0.95,
+    allocation: str = "uniform",
+    budget: Optional[int] = None,
+    ocba_delta: int = 27,
+    catalogue_path: Optional[str] = None,
 ) -> Tuple[List[dict], List[dict]]:
+    """
+    Runt alle 27 scenario's met n_reps herhalingen per scenario.
+
+    workers > 1 verdeelt de jobs over een pool: 1 job per
+    (scenario, herhaling), of per scenario bij engine="batched". De
+    resultaten worden in job-volgorde samengevoegd, dus scenario_rows en
+    topk_rows zijn gelijk voor elk aantal workers.
+
+    executor="process" gebruikt een process pool, executor="thread" een
+    thread pool. Threads delen de basis-huizen (houses_dict) en de
+    maatregelen (alleen gelezen) en maken per herhaling een eigen markt en
+    random generator; dat loont op een free-threaded Python (PEP 703),
+    waar threads echt parallel lopen.
+
+    rng_streams=True seedt elke herhaling met RunStreams(base_seed,
+    scenario_id, rep) in plaats van base_seed + scenario_id * 10_000 + rep:
+    onafhankelijke stromen voor populatie, markt en overstromingen, zonder
+    botsende seeds (andere trekkingen dan de standaard seeds).
+
+    cache_dir slaat elke herhaling op in een ResultCache; herhalingen die
+    al in de cache staan worden overgeslagen. Een afgebroken run gaat zo
+    verder waar hij gestopt is, met dezelfde uitkomsten.
+
+    target_rel_ci (bijv. 0.02) maakt n_reps een maximum: herhalingen lopen
+    in batches van batch_size en een scenario stopt zodra het
+    betrouwbaarheidsinterval (confidence) van elke CI_METRICS-uitkomst
+    hooguit target_rel_ci * |gemiddelde| breed is (halve breedte). De
+    kolom "reps" geeft het aantal gebruikte herhalingen. Herhaling rep
+    heeft altijd dezelfde seed, dus de uitkomst hangt niet af van workers.
+
+    allocation="ocba" is bedoeld om het beste scenario (hoogste
+    OCBA_METRIC) te vinden: na een pilot van n_reps herhalingen per
+    scenario worden per ronde ocba_delta extra herhalingen verdeeld met
+    OCBA (classes/ocba.py), vooral over scenario's waarvan de rangorde
+    ten opzichte van de huidige beste nog onzeker is, tot er in totaal
+    budget herhalingen zijn gedaan. De kolommen "ocba_best" en
+    "ocba_apcs" geven het gekozen scenario en de benaderde kans op een
+    correcte selectie.
+
+    catalogue_path legt elke herhaling (scenario, seed, looptijd en
+    uitkomsten) vast in een RunCatalogue (SQLite); herhalingen uit de
+    cache met cached = 1 en zonder looptijd.
+    """
     wealth_levels = ["Rijk", "Gemiddeld", "Arm"]
     exp_levels = ["Nooit", "Een keer", "Vaker dan een keer"]
     Ns = [10, 100, 1000]
@@ -125,79 +359,190 @@ def run_all_scenarios(
     scenario_rows: List[dict] = []
     topk_rows: List[dict] = []
 
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    run_catalogue = RunCatalogue(catalogue_path) if catalogue_path is not None else None
+
+    if executor not in ("process", "thread"):
+        raise ValueError(f"Unknown executor: {executor}")
+    if allocation not in ("uniform", "ocba"):
+        raise ValueError(f"Unknown allocation: {allocation}")
+    if allocation == "ocba":
+        if target_rel_ci is not None:
+            raise ValueError("allocation='ocba' cannot be combined with target_rel_ci")
+        if budget is None or n_reps < 2:
+            raise ValueError("allocation='ocba' needs a budget and a pilot of n_reps >= 2")
+
+    # Alle scenario's in vaste volgorde
+    scenarios = []
     scenario_id = 0
-
     for w in wealth_levels:
         for e in exp_levels:
             for N in Ns:
                 scenario_id += 1
+                scenarios.append((scenario_id, w, e, N))
+
+    def scenario_done(summary: ReplicateSummary) -> bool:
+        if len(summary) >= n_reps:
+            return True
+        if target_rel_ci is None:
+            return False
+        return all(precision_reached(summary[metric], target_rel_ci, confidence) for metric in CI_METRICS)
+
+    def ocba_inputs():
+        running = [summaries[scenario_id][OCBA_METRIC] for scenario_id, w, e, N in scenarios]
+        return [r.mean for r in running], [r.stdev for r in running], [r.n for r in running]
+
+    def wave_sizes() -> Dict[int, int]:
+        """Aantal nieuwe herhalingen per scenario in de volgende ronde."""
+        if allocation == "ocba" and all(summaries.values()):
+            remaining = budget - sum(len(summary) for summary in summaries.values())
+            if remaining <= 0:
+                return {}
+            extra = ocba_increments(*ocba_inputs(), min(ocba_delta, remaining))
+            return {scenario[0]: k for scenario, k in zip(scenarios, extra) if k > 0}
+
+        return {
+            scenario_id: min(wave_size, n_reps - len(summary))
+            for scenario_id, summary in summaries.items()
+            if not scenario_done(summary)
+        }
+
+    # Zonder precisiedoel 1 ronde met alle herhalingen, anders rondes van batch_size
+    wave_size = n_reps if target_rel_ci is None else batch_size
+    # Per scenario een lopende samenvatting; herhalingen worden direct verwerkt
+    summaries = {
+        scenario_id: ReplicateSummary(SUMMARY_METRICS, counters=("purchase_counts",))
+        for scenario_id, w, e, N in scenarios
+    }
+    sizes = wave_sizes()
+
+    pool = None
+    if workers is not None and workers > 1:
+        pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+        pool = pool_class(max_workers=workers)
+    try:
+        while sizes:
+            # Jobs voor de volgende batch herhalingen van elk actief scenario
+            wave = []
+            jobs = []
+            for scenario_id, w, e, N in scenarios:
+                if scenario_id not in sizes:
+                    continue
+                done = len(summaries[scenario_id])
+                reps = range(done, done + sizes[scenario_id])
+                seeds = [base_seed + scenario_id * 10_000 + rep for rep in reps]
+                keys = [(base_seed, scenario_id, rep) for rep in reps] if rng_streams else [None] * len(reps)
+
+                # Herhalingen die al in de cache staan hoeven niet opnieuw
+                cache_keys = [None] * len(reps)
+                cached = [None] * len(reps)
+                if cache is not None:
+                    cache_keys = [rep_cache_key(cache, w, e, N, seed, n_rounds, key) for seed, key in zip(seeds, keys)]
+                    cached = [cache.get(key) for key in cache_keys]
+                missing = [i for i in range(len(reps)) if cached[i] is None]
+
+                if engine == "batched":
+                    job_reps = [missing] if missing else []
+                else:
+                    job_reps = [[i] for i in missing]
+
+                for batch in job_reps:
+                    jobs.append((
+                        w, e, N, [seeds[i] for i in batch], n_rounds, engine,
+                        [keys[i] for i in batch] if rng_streams else None,
+                        cache_dir, [cache_keys[i] for i in batch],
+                    ))
+                wave.append((scenario_id, w, e, N, reps, seeds, cached, job_reps))
+
+            # map geeft de resultaten in job-volgorde, ongeacht welke job eerst klaar is
+            results = pool.map(run_scenario_job, jobs) if pool is not None else map(run_scenario_job, jobs)
+
+            # Gecachete en nieuw berekende herhalingen, in herhalingsvolgorde
+            catalogue_rows = []
+            for scenario_id, w, e, N, reps, seeds, cached, job_reps in wave:
+                batch_results = list(cached)
+                for batch in job_reps:
+                    for i, stats in zip(batch, next(results)):
+                        batch_results[i] = stats
+                for rep, seed, stats, cached_stats in zip(reps, seeds, batch_results, cached):
+                    from_cache = cached_stats is not None
+                    summaries[scenario_id].add(stats)
+                    catalogue_rows.append({
+                        "runner": "run_scenarios",
+                        "scenario_id": str(scenario_id),
+                        "wealth": w,
+                        "experience": e,
+                        "seed": None if rng_streams else seed,
+                        "rep": rep,
+                        "n_agents": N,
+                        "rounds": n_rounds,
+                        # een herhaling uit de cache is nu niet gerund: geen looptijd
+                        "runtime_s": None if from_cache else stats.get("runtime_s"),
+                        "cached": from_cache,
+                        "final_mean_satisfaction": stats["mean_satisfaction"],
+                        "mean_total_purchases_per_agent": stats["mean_total_purchases_per_agent"],
+                        "mean_unique_measures_per_agent": stats["mean_unique_measures_per_agent"],
+                    })
 
-                # Lege lijsten voor het opslaan van de gevonden data
-                rep_unique = []
-                rep_total = []
-                rep_sat = []
-                rep_rates_list: List[Dict[str, float]] = []
-                rep_purchase_counts_list: List[Counter] = [] #toegevoegd
-
-                for rep in range(n_reps):
-                    seed = base_seed + scenario_id * 10_000 + rep
-                    agents = run_one_simulation(w, e, N, seed, n_rounds=n_rounds)
-
-                    stats = scenario_core_stats(agents)
-                    rep_unique.append(stats["mean_unique_measures_per_agent"])
-                    rep_total.append(stats["mean_total_purchases_per_agent"])
-                    rep_sat.append(stats["mean_satisfaction"])
-
-                    rep_rates_list.append(adoption_rates(agents))
-                    rep_purchase_counts_list.append(purchase_counts(agents)) #toegevoegd
-
-                # resultaten van alle runs samen nemen tot gemiddelden
-                def _avg(x): return float(mean(x))
-                def _sd(x): return float(stdev(x)) if len(x) > 1 else 0.0
-
-                scenario_rows.append({
+                print(f"Done scenario {scenario_id:02d} | {w:9s} | {e:18s} | N={N} | reps={len(summaries[scenario_id])}")
+
+            if run_catalogue is not None:
+                run_catalogue.record(*catalogue_rows)
+
+            sizes = wave_sizes()
+
+        if allocation == "ocba":
+            means, sds, counts = ocba_inputs()
+            best = scenarios[best_index(means)][0]
+            apcs = approx_pcs(means, sds, counts)
+            print(f"OCBA: best scenario {best:02d} | APCS={apcs:.3f} | reps={sum(counts)}")
+
+        for scenario_id, w, e, N in scenarios:
+            summary = summaries[scenario_id]
+            rep_unique = summary["mean_unique_measures_per_agent"]
+            rep_total = summary["mean_total_purchases_per_agent"]
+            rep_sat = summary["mean_satisfaction"]
+
+            scenario_rows.append({
+                "scenario": scenario_id,
+                "wealth": w,
+                "experience": e,
+                "N": N,
+                "rounds": n_rounds,
+                "reps": len(summary),
+                "avg_unique_measures_per_agent": rep_unique.mean,
+                "sd_unique_measures_per_agent": rep_unique.stdev,
+                "avg_total_purchases_per_agent": rep_total.mean,
+                "sd_total_purchases_per_agent": rep_total.stdev,
+                "avg_satisfaction": rep_sat.mean,
+                "sd_satisfaction": rep_sat.stdev,
+            })
+            if allocation == "ocba":
+                scenario_rows[-1]["ocba_best"] = scenario_id == best
+                scenario_rows[-1]["ocba_apcs"] = apcs
+
+            # Top meest gekozen maatregelen (op basis van hoe vaak gekozen per agent)
+            measure_intensities = []
+            for m, total in summary.counters["purchase_counts"].items():
+                # (totaal aankopen van m over alle herhalingen) / (N * herhalingen) => gemiddeld aantal aankopen per agent
+                avg_purchases_per_agent = total / (N * len(summary))
+                measure_intensities.append((m, avg_purchases_per_agent))
+
+            measure_intensities.sort(key=lambda x: x[1], reverse=True) #sorteert maatregelen op gemiddelde aankoopintensiteit per agent
+
+            for rank, (m, avg_purchases_per_agent) in enumerate(measure_intensities[:top_k_measures], start=1):
+                topk_rows.append({
                     "scenario": scenario_id,
                     "wealth": w,
                     "experience": e,
                     "N": N,
-                    "rounds": n_rounds,
-                    "reps": n_reps,
-                    "avg_unique_measures_per_agent": _avg(rep_unique),
-                    "sd_unique_measures_per_agent": _sd(rep_unique),
-                    "avg_total_purchases_per_agent": _avg(rep_total),
-                    "sd_total_purchases_per_agent": _sd(rep_total),
-                    "avg_satisfaction": _avg(rep_sat),
-                    "sd_satisfaction": _sd(rep_sat),
+                    "rank": rank,
+                    "measure": m,
+                    "avg_purchases_per_agent": avg_purchases_per_agent,
                 })
-
-                # Top meest gekozen maatregelen (op basis van hoe vaak gekozen per agent)
-                all_measures = set()
-                for d in rep_purchase_counts_list:
-                    all_measures |= set(d.keys())
-
-                measure_intensities = []
-                for m in all_measures:
-                    # per herhaling: (totaal aankopen van m) / N  => gemiddeld aantal aankopen per agent
-                    avg_purchases_per_agent = float(
-                        mean(d.get(m, 0) / N for d in rep_purchase_counts_list)
-                    )
-                    measure_intensities.append((m, avg_purchases_per_agent))
-
-                measure_intensities.sort(key=lambda x: x[1], reverse=True) #sorteert maatregelen op gemiddelde aankoopintensiteit per agent
-
-                for rank, (m, avg_purchases_per_agent) in enumerate(measure_intensities[:top_k_measures], start=1):
-                    topk_rows.append({
-                        "scenario": scenario_id,
-                        "wealth": w,
-                        "experience": e,
-                        "N": N,
-                        "rank": rank,
-                        "measure": m,
-                        "avg_purchases_per_agent": avg_purchases_per_agent,
-                    })
-                
-
-                print(f"Done scenario {scenario_id:02d} | {w:9s} | {e:18s} | N={N} | reps={n_reps}")
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
     return scenario_rows, topk_rows
 
@@ -260,12 +605,20 @@ if __name__ == "__main__":
     BASE_SEED = 1000
     N_ROUNDS = 4
     TOP_K = 5
+    WORKERS = 1  # > 1: herhalingen parallel over zoveel processen
+    CACHE_DIR = "cache"  # None: geen cache; anders gaat een afgebroken run hier verder
+    TARGET_REL_CI = None  # bijv. 0.02: stop per scenario bij een 95%-interval van +-2% (max N_REPS)
 
     scenario_rows, topk_rows = run_all_scenarios(
         n_reps=N_REPS,
         base_seed=BASE_SEED,
         n_rounds=N_ROUNDS,
         top_k_measures=TOP_K,
+        workers=WORKERS,
+        cache_dir=CACHE_DIR,
+        target_rel_ci=TARGET_REL_CI,
+        catalogue_path="results/runs.sqlite",
+        rng_streams=True,
     )
 
     out_file = "ScenarioResults.xlsx"
@@ -7,24 +7,62 @@
 #  ------------------------------------------------------------
 
 from classes.initialisation import initialise_agents_n
+from classes.homeowner_agent import shared_params
+from classes.result_cache import ResultCache, code_version, fingerprint
 from classes.measures import measures
 from classes.hazard_generator import floods
-from data.houses_dict import houses_dict, generate_houses_from_agents
+from classes.housing_market import HousingMarket
+from data.houses_dict import houses_dict, generate_house_table_from_agents
 
 
-def run_model_with_param(seed, n_agents, param_name=None, param_value=None):
+CACHE_DIR = "cache"  # None: alleen binnen de sessie onthouden, niet op schijf
+
+# Uitkomsten van deze sessie, per cache-sleutel
+_session_results = {}
+
+
+def run_model_with_param(seed, n_agents, param_name=None, param_value=None, cache_dir=CACHE_DIR):
+    """
+    Gemiddeld aantal maatregelen per agent voor 1 run (met 1 aangepaste parameter).
+
+    De uitkomst hangt alleen af van seed, n_agents en de effectieve
+    parameters (defaults plus aanpassing). Elke unieke configuratie wordt
+    per sessie 1 keer gerund en in cache_dir bewaard; zo delen de
+    gevoeligheidsanalyse, de ANOVA en de basisconditie ("0" is voor elke
+    parameter dezelfde run) hun resultaten.
+    """
+    overrides = {param_name: param_value} if param_name is not None else None
+
+    key = fingerprint({
+        "runner": "sensitivity",
+        "seed": seed,
+        "n_agents": n_agents,
+        "params": shared_params(overrides),
+        "code": code_version(_run_model),
+    })
+    if key in _session_results:
+        return _session_results[key]
+
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    output = cache.get(key) if cache is not None else None
+    if output is None:
+        output = _run_model(seed, n_agents, overrides)
+        if cache is not None:
+            cache.put(key, output)
+
+    _session_results[key] = output
+    return output
+
+
+def _run_model(seed, n_agents, overrides):
     import random
     random.seed(seed)
 
-    agents = initialise_agents_n(n=n_agents, seed=seed)
-
-    # Parameter toepassen op alle agenten
-    if param_name is not None:
-        for a in agents:
-            a.params[param_name] = param_value
+    # Parameter toepassen op alle agenten (gedeelde parameters van de populatie)
+    agents = initialise_agents_n(n=n_agents, seed=seed, params=overrides)
 
     # woningmarkt wordt elke run opnieuw gegenereerd want elke run is zo compleet onafhankelijk
-    big_houses_dict = generate_houses_from_agents( 
+    big_houses_dict = HousingMarket(generate_house_table_from_agents( 
         houses_dict,
         agents,
         target_n_houses=2000,
@@ -32,7 +70,7 @@ def run_model_with_param(seed, n_agents, param_name=None, param_value=None):
         affordability_quantile=0.95,
         house_price_quantile=0.20,
         jitter=0.10
-    )
+    ))
 
     for round_nr in range(1, 5):
         flood_results = floods()
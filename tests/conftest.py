@@ -0,0 +1,13 @@
+"""
+Gedeelde setup voor de tests: de modules worden vanuit de repo-root
+geïmporteerd en data/houses_dict.py leest data/houses.xlsx relatief aan de
+werkmap, dus de tests draaien vanuit de repo-root.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
@@ -0,0 +1,35 @@
+import pytest
+
+from run_scenarios import run_scenario_job
+
+ENGINES = ("agents", "population", "batched")
+
+
+def job_stats(w, e, N, seeds, engine, stream_keys=None):
+    job = (w, e, N, seeds, 5, engine, stream_keys, None, [None] * len(seeds))
+    results = run_scenario_job(job)
+    for stats in results:
+        assert stats.pop("runtime_s") >= 0
+    return results
+
+
+@pytest.mark.parametrize("w, e, N", [("Rijk", "Nooit", 10), ("Arm", "Vaker dan een keer", 25),
+                                     ("Gemiddeld", "Een keer", 40)])
+def test_engines_give_identical_results(w, e, N):
+    seeds = [3, 11, 12]
+    reference = job_stats(w, e, N, seeds, "agents")
+    assert len(reference) == len(seeds)
+    for engine in ENGINES[1:]:
+        assert job_stats(w, e, N, seeds, engine) == reference
+
+
+def test_engines_give_identical_results_with_streams():
+    keys = [(42, 4, rep) for rep in range(3)]
+    reference = job_stats("Gemiddeld", "Nooit", 20, [None] * 3, "agents", stream_keys=keys)
+    for engine in ENGINES[1:]:
+        assert job_stats("Gemiddeld", "Nooit", 20, [None] * 3, engine, stream_keys=keys) == reference
+
+
+def test_seeds_give_different_replicates():
+    first, second = job_stats("Arm", "Een keer", 40, [1, 2], "population")
+    assert first != second
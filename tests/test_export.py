@@ -0,0 +1,101 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import experiment
+from classes.house_table import HouseTable
+from classes.housing_market import HousingMarket
+from classes.initialisation import initialise_agents_n
+from export import (HistoryRecorder, add_round_zero, history_tables, initialise_history, measure_columns,
+                    measure_holdings, update_history)
+
+
+def simulate(scenario, seed):
+    """
+    Eén run met zowel de oude history dict als de HistoryRecorder.
+    """
+
+    s = experiment.SCENARIOS[scenario]
+    s = type(s)(**{**s.__dict__, "agents": 60, "rounds": 6})
+    rng = random.Random(seed)
+    agents = initialise_agents_n(n=s.agents, seed=seed, rng=rng)
+    market = HousingMarket(HouseTable.from_dict(experiment.houses_dict))
+    policy_measures = experiment.make_policy_measures(s)
+
+    old = initialise_history()
+    add_round_zero(old, agents)
+    recorder = HistoryRecorder(agents, s.rounds)
+    recorder.record(0)
+
+    for round_nr in range(1, s.rounds + 1):
+        flood_results = experiment.floods_for_round(s, round_nr, rng)
+        for agent in agents:
+            agent.step(market, policy_measures, flood_results, current_round=round_nr)
+        for agent in agents:
+            update_history(old, agent, flood_results, round_nr)
+        recorder.record(round_nr, flood_results)
+
+    recorder.finish()
+    return pd.DataFrame(old), recorder
+
+
+@pytest.fixture(scope="module", params=[(1, 3), (4, 7)])
+def run(request):
+    return simulate(*request.param)
+
+
+def test_recorder_matches_old_history(run):
+    old, recorder = run
+    new = recorder.to_frame()
+    assert len(recorder.purchases()) > 0
+    pd.testing.assert_frame_equal(
+        new[old.columns].drop(columns="flood_results").reset_index(drop=True),
+        old.drop(columns="flood_results"),
+        check_dtype=False,
+    )
+
+
+def test_measure_columns_round_trip(run):
+    old, recorder = run
+    rows, purchases = history_tables(recorder)
+    rebuilt = measure_columns(rows, purchases)
+    assert rebuilt["measures"].tolist() == old["measures"].tolist()
+    assert rebuilt["new_measures"].tolist() == old["new_measures"].tolist()
+
+    # Ook vanuit de strings van de oude history dict
+    rows, purchases = history_tables(old.to_dict("list"))
+    assert measure_columns(rows, purchases)["measures"].tolist() == old["measures"].tolist()
+
+
+def test_measure_holdings_counts_the_measures_strings(run):
+    old, recorder = run
+    rows, purchases = history_tables(recorder)
+    holdings = measure_holdings(rows, purchases)
+
+    assert (holdings.to_numpy() >= 0).all()
+    for i, held in enumerate(old["measures"]):
+        names = [name for name in held.split(";") if name]
+        expected = {name: names.count(name) for name in names}
+        counts = holdings.iloc[i]
+        assert counts[counts > 0].to_dict() == expected
+
+    # Houdingen nemen per agent nooit af
+    diffs = holdings.groupby(rows["agent_id"]).diff().fillna(0).to_numpy()
+    assert (diffs >= 0).all()
+
+
+def test_measure_holdings_of_several_runs():
+    _, recorder_a = simulate(1, 3)
+    _, recorder_b = simulate(4, 7)
+    frames = []
+    for scenario_id, recorder in (("a", recorder_a), ("b", recorder_b)):
+        rows, purchases = history_tables(recorder)
+        frames.append((rows.assign(scenario_id=scenario_id), purchases.assign(scenario_id=scenario_id)))
+    rows = pd.concat([f[0] for f in frames], ignore_index=True)
+    purchases = pd.concat([f[1] for f in frames], ignore_index=True)
+
+    holdings = measure_holdings(rows, purchases)
+    single = measure_holdings(*history_tables(recorder_a))
+    np.testing.assert_array_equal(holdings.iloc[: len(single)][single.columns].to_numpy(), single.to_numpy())
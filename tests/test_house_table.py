@@ -0,0 +1,41 @@
+import pytest
+
+from classes.house_table import HouseTable
+from data.houses_dict import houses_dict
+
+
+def test_from_dict_to_dict_round_trip():
+    table = HouseTable.from_dict(houses_dict)
+    assert len(table) == len(houses_dict)
+    assert table.to_dict() == houses_dict
+
+
+def test_rows_read_and_write_the_columns():
+    table = HouseTable.from_dict(houses_dict)
+    row = table[3]
+    assert row.to_dict() == houses_dict[table.label(3)]
+    row["available"] = False
+    assert not table.available[3]
+    with pytest.raises(KeyError):
+        table[len(table)]
+
+
+def test_overlay_has_its_own_availability():
+    base = HouseTable.from_dict(houses_dict)
+    first, second = base.overlay(), base.overlay()
+
+    first[0]["available"] = False
+    second[1]["available"] = False
+
+    assert base.available.all()
+    assert not first.available[0] and first.available[1]
+    assert not second.available[1] and second.available[0]
+
+
+def test_overlay_shares_the_house_columns():
+    base = HouseTable.from_dict(houses_dict)
+    overlay = base.overlay()
+    for name in ("value", "available_round", "rain_protection", "river_protection", "preferred_rating"):
+        assert overlay.columns[name] is base.columns[name]
+    assert overlay.available is not base.available
+    assert overlay.measure_sets is base.measure_sets
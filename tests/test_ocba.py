@@ -0,0 +1,43 @@
+from math import sqrt
+
+import pytest
+
+from classes.ocba import approx_pcs, best_index, ocba_fractions, ocba_increments
+
+
+def test_fractions_on_known_example():
+    # b = 2; N_0 : N_1 = (1/2)^2 : (1/1)^2 en N_b = sqrt(N_0^2 + N_1^2)
+    weights = [0.25, 1.0, sqrt(0.25**2 + 1.0)]
+    expected = [w / sum(weights) for w in weights]
+    assert ocba_fractions([1.0, 2.0, 3.0], [1.0, 1.0, 1.0]) == pytest.approx(expected)
+
+
+def test_noisy_close_scenarios_get_more_replicates():
+    fractions = ocba_fractions([0.0, 2.9, 3.0, 1.0], [1.0, 2.0, 1.0, 0.1])
+    assert sum(fractions) == pytest.approx(1.0)
+    assert fractions[1] > fractions[0] > fractions[3]
+
+
+def test_increments_assign_exactly_delta():
+    means, sds = [1.0, 2.0, 3.0, 2.5], [1.0, 0.5, 1.0, 2.0]
+    counts = [10, 10, 10, 10]
+    for delta in (1, 7, 40, 333):
+        extra = ocba_increments(means, sds, counts, delta)
+        assert sum(extra) == delta
+        assert all(x >= 0 for x in extra)
+
+
+def test_increments_fill_the_shortfall_first():
+    # Scenario 0 heeft al veel meer dan zijn OCBA-aandeel
+    extra = ocba_increments([1.0, 2.0, 3.0], [1.0, 1.0, 1.0], [50, 5, 5], 20)
+    assert extra[0] == 0
+    assert sum(extra) == 20
+
+
+def test_approx_pcs():
+    assert best_index([1.0, 3.0, 3.0, 2.0]) == 1
+    assert approx_pcs([0.0, 10.0], [1.0, 1.0], [10, 10]) == pytest.approx(1.0)
+    # Twee gelijke scenario's: de kans op een foute keuze is 1/2
+    assert approx_pcs([1.0, 1.0], [1.0, 1.0], [10, 10]) == pytest.approx(0.5)
+    more = approx_pcs([1.0, 1.5], [1.0, 1.0], [40, 40])
+    assert approx_pcs([1.0, 1.5], [1.0, 1.0], [10, 10]) < more < 1.0
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from classes.online_stats import CountSketch, ReplicateSummary, RunningStats, SketchCollector
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).normal(-4.8, 0.6, size=257)
+
+
+def test_running_stats_matches_numpy(values):
+    stats = RunningStats(values)
+    assert stats.n == len(values)
+    assert stats.mean == pytest.approx(np.mean(values))
+    assert stats.variance == pytest.approx(np.var(values, ddof=1))
+    assert stats.stdev == pytest.approx(np.std(values, ddof=1))
+
+
+def test_merge_matches_numpy(values):
+    merged = RunningStats()
+    for part in np.array_split(values, [3, 4, 100, 200]):
+        merged.merge(RunningStats(part))
+    merged.merge(RunningStats())
+    assert merged.n == len(values)
+    assert merged.mean == pytest.approx(np.mean(values))
+    assert merged.variance == pytest.approx(np.var(values, ddof=1))
+
+
+def test_fewer_than_two_values():
+    assert RunningStats().variance == 0.0
+    one = RunningStats([2.5])
+    assert (one.mean, one.variance) == (2.5, 0.0)
+
+
+def test_replicate_summary():
+    summary = ReplicateSummary(["satisfaction"], counters=["purchases"])
+    summary.add({"satisfaction": 1.0, "purchases": {"Sandbags": 2}, "ignored": 0})
+    summary.add({"satisfaction": 3.0, "purchases": {"Sandbags": 1, "Pump": 4}})
+    assert len(summary) == 2
+    assert summary["satisfaction"].mean == 2.0
+    assert summary["satisfaction"].variance == 2.0
+    assert summary.counters["purchases"] == {"Sandbags": 3, "Pump": 4}
+
+
+@pytest.mark.parametrize("q", [0.0, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 1.0])
+def test_count_sketch_quantile_matches_numpy(q):
+    values = np.random.default_rng(1).integers(-12, 9, size=1001)
+    sketch = CountSketch(values)
+    assert sketch.quantile(q) == np.quantile(values, q)
+
+
+def test_count_sketch_merge_and_moments():
+    values = np.random.default_rng(2).integers(-5, 6, size=300)
+    merged = CountSketch(values[:120])
+    merged.merge(CountSketch(values[120:]))
+    assert merged.counts == CountSketch(values).counts
+    assert merged.n == len(values)
+    assert merged.mean == pytest.approx(np.mean(values))
+    assert merged.variance == pytest.approx(np.var(values, ddof=1))
+    assert merged.quantile(0.5) == np.median(values)
+    with pytest.raises(ValueError):
+        CountSketch().quantile(0.5)
+
+
+def test_sketch_collector_merge_and_regroup():
+    a, b = SketchCollector(), SketchCollector()
+    a.add((0, 11, 1), [1, 2, 2])
+    b.add((0, 11, 1), [3])
+    b.add((0, 12, 1), [2, 5])
+
+    a.merge(b)
+    assert len(a) == 2
+    assert a.sketch((0, 11, 1)).counts == {1: 1, 2: 2, 3: 1}
+
+    # Samenvoegen over de seeds
+    pooled = a.regroup(lambda k: (k[0], k[-1]))
+    assert len(pooled) == 1
+    assert pooled.sketch((0, 1)).counts == {1: 1, 2: 3, 3: 1, 5: 1}
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from classes.result_cache import ResultCache, code_version, fingerprint
+
+
+def test_put_get_round_trip(tmp_path):
+    cache = ResultCache(tmp_path)
+    key = cache.key(scenario=3, seed=7)
+    assert key not in cache
+    assert cache.get(key) is None
+    assert cache.get(key, default="missing") == "missing"
+
+    value = {"satisfaction": [1.5, -0.25], "runtime_s": 0.1}
+    cache.put(key, value)
+    assert key in cache
+    assert cache.get(key) == value
+    assert ResultCache(tmp_path).get(key) == value
+
+
+def test_key_ignores_order_but_not_values(tmp_path):
+    cache = ResultCache(tmp_path)
+    assert cache.key(a=1, b={"x": 1, "y": 2}) == cache.key(b={"y": 2, "x": 1}, a=1)
+    assert cache.key(a=1, b=2) != cache.key(a=1, b=3)
+    assert fingerprint({"a": 1}) == fingerprint({"a": 1})
+
+
+def test_put_is_atomic_and_last_writer_wins(tmp_path):
+    cache = ResultCache(tmp_path)
+    key = cache.key(run=1)
+    values = [list(range(i, i + 1000)) for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda v: cache.put(key, v), values))
+
+    assert cache.get(key) in values
+    assert not list(tmp_path.rglob("*.tmp"))
+    assert len(list(tmp_path.rglob("*.pkl"))) == 1
+
+
+def test_code_version_depends_on_extra_code(tmp_path):
+    def simulate():
+        return 1
+
+    def other():
+        return 2
+
+    assert code_version() == code_version()
+    assert code_version(simulate) != code_version()
+    assert code_version(simulate) != code_version(other)
+
+    extra = tmp_path / "extra.py"
+    extra.write_text("x = 1\n")
+    before = code_version(str(extra))
+    extra.write_text("x = 2\n")
+    code_version.cache_clear()
+    assert code_version(str(extra)) != before
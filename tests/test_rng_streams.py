@@ -0,0 +1,30 @@
+from classes.rng_streams import STREAM_NAMES, RunStreams
+
+
+def draws(rng, n=5):
+    return [rng.random() for _ in range(n)]
+
+
+def test_same_key_gives_same_streams():
+    a, b = RunStreams(42, 1, 7), RunStreams(42, 1, 7)
+    assert a.seeds == b.seeds
+    for name in STREAM_NAMES:
+        assert draws(getattr(a, name)) == draws(getattr(b, name))
+
+
+def test_different_keys_and_base_seeds_differ():
+    seeds = {RunStreams(42, 1, 7).seeds["floods"], RunStreams(42, 7, 1).seeds["floods"],
+             RunStreams(42, 1, 10_007).seeds["floods"], RunStreams(43, 1, 7).seeds["floods"]}
+    assert len(seeds) == 4
+
+
+def test_streams_of_one_run_are_independent():
+    streams = RunStreams(42, 0, 0)
+    assert set(streams.seeds) == set(STREAM_NAMES)
+    assert len(set(streams.seeds.values())) == len(STREAM_NAMES)
+
+
+def test_draws_in_one_stream_do_not_shift_another():
+    a, b = RunStreams(42, 3, 2), RunStreams(42, 3, 2)
+    draws(a.population, 100)
+    assert draws(a.floods) == draws(b.floods)
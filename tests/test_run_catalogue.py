@@ -0,0 +1,67 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from classes.run_catalogue import RunCatalogue
+
+
+def run(**fields):
+    row = {"runner": "experiment", "scenario_id": "S1", "seed": 1, "n_agents": 10, "rounds": 5,
+           "runtime_s": 0.5, "final_mean_satisfaction": 2.0}
+    row.update(fields)
+    return row
+
+
+def test_record_and_query(tmp_path):
+    catalogue = RunCatalogue(tmp_path / "sub" / "runs.sqlite")
+    catalogue.record(run(seed=1), run(seed=np.int64(2), final_mean_satisfaction=np.float64(4.0)))
+
+    rows = catalogue.query("SELECT seed, cached, final_mean_satisfaction FROM runs ORDER BY seed")
+    assert rows == [
+        {"seed": 1, "cached": 0, "final_mean_satisfaction": 2.0},
+        {"seed": 2, "cached": 0, "final_mean_satisfaction": 4.0},
+    ]
+
+
+def test_recording_a_run_again_replaces_it(tmp_path):
+    catalogue = RunCatalogue(tmp_path / "runs.sqlite")
+    catalogue.record(run(seed=None, rep=0), run(seed=None, rep=1))
+    catalogue.record(run(seed=None, rep=0, runtime_s=None, cached=True, final_mean_satisfaction=3.0))
+
+    rows = catalogue.query("SELECT rep, runtime_s, cached, final_mean_satisfaction FROM runs ORDER BY rep")
+    assert rows == [
+        {"rep": 0, "runtime_s": None, "cached": 1, "final_mean_satisfaction": 3.0},
+        {"rep": 1, "runtime_s": 0.5, "cached": 0, "final_mean_satisfaction": 2.0},
+    ]
+
+
+def test_unknown_column_is_rejected(tmp_path):
+    catalogue = RunCatalogue(tmp_path / "runs.sqlite")
+    with pytest.raises(KeyError):
+        catalogue.record(run(colour="blue"))
+
+
+def test_scenario_summary(tmp_path):
+    catalogue = RunCatalogue(tmp_path / "runs.sqlite")
+    catalogue.record(run(seed=1), run(seed=2, final_mean_satisfaction=4.0), run(scenario_id="S2"),
+                     run(runner="run_scenarios", scenario_id="S2"))
+
+    summary = catalogue.scenario_summary(runner="experiment")
+    assert [(r["scenario_id"], r["reps"], r["avg_satisfaction"]) for r in summary] == [("S1", 2, 3.0), ("S2", 1, 2.0)]
+
+
+def test_old_catalogue_gets_new_columns(tmp_path):
+    path = tmp_path / "runs.sqlite"
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY, runner TEXT NOT NULL, scenario_id TEXT NOT NULL,"
+                           " seed INTEGER, n_agents INTEGER, rounds INTEGER)")
+        connection.execute("INSERT INTO runs (runner, scenario_id, seed) VALUES ('experiment', 'S0', 9)")
+    connection.close()
+
+    catalogue = RunCatalogue(path)
+    catalogue.record(run())
+    rows = catalogue.query("SELECT scenario_id, cached, runtime_s FROM runs ORDER BY id")
+    assert rows == [{"scenario_id": "S0", "cached": 0, "runtime_s": None},
+                    {"scenario_id": "S1", "cached": 0, "runtime_s": 0.5}]
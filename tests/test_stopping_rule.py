@@ -0,0 +1,41 @@
+import random
+from statistics import mean, stdev
+
+import pytest
+
+from classes.online_stats import RunningStats
+from classes.stopping_rule import ci_half_width, precision_reached, reps_needed, t_quantile
+
+
+@pytest.mark.parametrize(
+    "p, df, expected",
+    [(0.975, 5, 2.5706), (0.975, 10, 2.2281), (0.975, 30, 2.0423), (0.995, 20, 2.8453), (0.95, 9, 1.8331)],
+)
+def test_t_quantile_matches_tables(p, df, expected):
+    assert t_quantile(p, df) == pytest.approx(expected, abs=2e-3)
+
+
+def test_ci_half_width_list_and_running_stats_agree():
+    rng = random.Random(1)
+    values = [rng.gauss(5, 2) for _ in range(40)]
+    expected = t_quantile(0.975, 39) * stdev(values) / len(values) ** 0.5
+    assert ci_half_width(values) == pytest.approx(expected)
+    assert ci_half_width(RunningStats(values)) == pytest.approx(expected)
+    assert ci_half_width(values[:1]) == float("inf")
+
+
+def test_precision_reached():
+    assert not precision_reached([3.0], 0.5)
+    assert precision_reached([10.0, 10.1, 9.9, 10.0, 10.05], 0.05)
+    assert not precision_reached([1.0, 20.0, -5.0, 8.0, 3.0], 0.05)
+
+
+def test_reps_needed_returns_first_batch_that_is_precise_enough():
+    rng = random.Random(2)
+    values = [rng.gauss(10, 1) for _ in range(100)]
+    n = reps_needed(values, 0.05, batch_size=10)
+    assert n is not None and n % 10 == 0
+    assert precision_reached(values[:n], 0.05)
+    assert not any(precision_reached(values[:k], 0.05) for k in range(10, n, 10))
+    assert reps_needed(values, 1e-6, batch_size=10) is None
+    assert abs(mean(values[:n]) - 10) < 1